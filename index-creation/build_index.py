@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""Build an index concurrently, report its progress, then verify it.
+
+Replaces the two racing ``nohup psql`` jobs in commands.sh:
+
+1. An INVALID index of the same name, left behind by a failed build, is
+   dropped first. A valid one is kept and only verified. An index is also
+   INVALID while ``CREATE INDEX CONCURRENTLY`` is still building it, so one
+   that another backend is building (per ``pg_stat_progress_create_index``)
+   is left alone and the run stops.
+2. ``CREATE INDEX CONCURRENTLY`` runs on its own connection with the given
+   session settings, while a second connection polls
+   ``pg_stat_progress_create_index`` for that backend and logs the phase,
+   blocks and tuples done and an ETA for the current phase.
+3. If the build fails, the INVALID index it leaves behind is dropped, with
+   the same check.
+4. Only after a successful build, ``bt_index_check`` (amcheck) verifies the
+   new index.
+
+Connection settings come from the same environment variables as
+commands.sh (DATABASE_USER, DATABASE_HOST, DATABASE_NAME, DATABASE_PASSWORD,
+plus optional DATABASE_PORT), so it runs just as well against a local
+PostgreSQL:
+
+    DATABASE_USER=postgres DATABASE_HOST=localhost DATABASE_NAME=medallion \\
+        python build_index.py --maintenance-work-mem 2GB --parallel-workers 4
+"""
+
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+
+import psycopg2
+from psycopg2 import sql
+
+logger = logging.getLogger("build_index")
+
+DEFAULT_INDEX = "history_pro_update__9dff21_idx"
+DEFAULT_TABLE = "history_provideraudithistory"
+DEFAULT_COLUMNS = "update_kind_id,update_id"
+
+PROGRESS_QUERY = """
+SELECT
+    p.phase,
+    p.blocks_total,
+    p.blocks_done,
+    p.tuples_total,
+    p.tuples_done,
+    now() - a.query_start AS duration
+FROM
+    pg_stat_progress_create_index p
+JOIN
+    pg_stat_activity a ON p.pid = a.pid
+WHERE
+    p.pid = %s
+"""
+
+INDEX_VALID_QUERY = """
+SELECT i.indisvalid
+FROM pg_index i
+JOIN pg_class c ON c.oid = i.indexrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE c.relname = %s AND n.nspname = %s
+"""
+
+INVALID_INDEXES_QUERY = """
+SELECT c.relname
+FROM pg_index i
+JOIN pg_class c ON c.oid = i.indexrelid
+JOIN pg_class t ON t.oid = i.indrelid
+JOIN pg_namespace n ON n.oid = t.relnamespace
+WHERE NOT i.indisvalid AND t.relname = %s AND n.nspname = %s
+"""
+
+# index_relid is set for the whole of a concurrent build, which is the only
+# kind that leaves an INVALID index visible to other sessions.
+ACTIVE_BUILD_QUERY = """
+SELECT p.pid, p.phase
+FROM pg_stat_progress_create_index p
+JOIN pg_class c ON c.oid = p.index_relid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE c.relname = %s AND n.nspname = %s
+"""
+
+
+def connect():
+    connection = psycopg2.connect(
+        user=os.environ["DATABASE_USER"],
+        password=os.environ.get("DATABASE_PASSWORD"),
+        host=os.environ["DATABASE_HOST"],
+        port=os.environ.get("DATABASE_PORT", "5432"),
+        dbname=os.environ["DATABASE_NAME"],
+        application_name="build_index",
+    )
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block
+    connection.autocommit = True
+    return connection
+
+
+def index_is_valid(cursor, schema, index):
+    """Return True/False for an existing index, None if there is none."""
+    cursor.execute(INDEX_VALID_QUERY, (index, schema))
+    row = cursor.fetchone()
+    return None if row is None else row[0]
+
+
+def drop_index(cursor, schema, index):
+    logger.info(f"Dropping invalid index {schema}.{index}")
+    cursor.execute(
+        sql.SQL("DROP INDEX CONCURRENTLY IF EXISTS {}").format(
+            sql.Identifier(schema, index)
+        )
+    )
+
+
+def active_build(cursor, schema, index):
+    """Return (pid, phase) of a backend still building ``index``, or None."""
+    cursor.execute(ACTIVE_BUILD_QUERY, (index, schema))
+    return cursor.fetchone()
+
+
+def drop_failed_index(cursor, schema, index):
+    """Drop an INVALID index unless a backend is still building it.
+
+    Returns whether it was dropped.
+    """
+    build = active_build(cursor, schema, index)
+    if build is not None:
+        pid, phase = build
+        logger.warning(
+            f"Index {schema}.{index} is still being built by pid {pid} "
+            f"({phase}), not dropping it"
+        )
+        return False
+    drop_index(cursor, schema, index)
+    return True
+
+
+def drop_invalid_indexes(cursor, schema, table):
+    cursor.execute(INVALID_INDEXES_QUERY, (table, schema))
+    invalid = [name for (name,) in cursor.fetchall()]
+    return [index for index in invalid if drop_failed_index(cursor, schema, index)]
+
+
+def format_eta(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+class ProgressMonitor:
+    """Turns pg_stat_progress_create_index rows into log lines.
+
+    The ETA covers the current phase only: each phase counts blocks or tuples
+    against its own total, so it is the done/total rate since the phase
+    started, projected over what is left of it.
+    """
+
+    def __init__(self):
+        self.phase = None
+        self.phase_started = None
+        self.phase_done = 0
+
+    def describe(self, row, now=None):
+        now = time.monotonic() if now is None else now
+        phase, blocks_total, blocks_done, tuples_total, tuples_done, duration = row
+        if blocks_total:
+            done, total, unit = blocks_done, blocks_total, "blocks"
+        else:
+            done, total, unit = tuples_done, tuples_total, "tuples"
+        if phase != self.phase:
+            self.phase, self.phase_started, self.phase_done = phase, now, done
+        line = (
+            f"{phase}: blocks {blocks_done}/{blocks_total}, "
+            f"tuples {tuples_done}/{tuples_total}, running {duration}"
+        )
+        if total:
+            line += f", {done / total * 100:.1f}% of phase"
+            elapsed = now - self.phase_started
+            progressed = done - self.phase_done
+            if elapsed > 0 and progressed > 0:
+                eta = (total - done) / (progressed / elapsed)
+                line += f", phase ETA {format_eta(eta)} ({unit})"
+        return line
+
+
+def build_index(connection, statement, settings):
+    """Run ``statement`` on ``connection``; return the error, or None."""
+    try:
+        with connection.cursor() as cursor:
+            for name, value in settings.items():
+                cursor.execute("SELECT set_config(%s, %s, false)", (name, value))
+            cursor.execute(statement)
+    except psycopg2.Error as error:
+        return error
+    return None
+
+
+def run_build(args):
+    build_connection = connect()
+    monitor_connection = connect()
+    with monitor_connection.cursor() as cursor:
+        valid = index_is_valid(cursor, args.schema, args.index)
+        if valid is False and not drop_failed_index(cursor, args.schema, args.index):
+            return False
+        if valid:
+            logger.info(f"Index {args.schema}.{args.index} already exists and is valid")
+            return True
+
+    statement = sql.SQL("CREATE INDEX CONCURRENTLY {} ON {} ({})").format(
+        sql.Identifier(args.index),
+        sql.Identifier(args.schema, args.table),
+        sql.SQL(", ").join(map(sql.Identifier, args.columns.split(","))),
+    )
+    settings = {}
+    if args.maintenance_work_mem:
+        settings["maintenance_work_mem"] = args.maintenance_work_mem
+    if args.parallel_workers is not None:
+        settings["max_parallel_maintenance_workers"] = str(args.parallel_workers)
+
+    with build_connection.cursor() as cursor:
+        cursor.execute("SELECT pg_backend_pid()")
+        (build_pid,) = cursor.fetchone()
+    logger.info(f"Building: {statement.as_string(build_connection)} (pid {build_pid})")
+
+    result = {}
+    builder = threading.Thread(
+        target=lambda: result.update(
+            error=build_index(build_connection, statement, settings)
+        )
+    )
+    started = time.monotonic()
+    builder.start()
+    monitor = ProgressMonitor()
+    with monitor_connection.cursor() as cursor:
+        while builder.is_alive():
+            builder.join(args.poll_interval)
+            if not builder.is_alive():
+                break
+            cursor.execute(PROGRESS_QUERY, (build_pid,))
+            row = cursor.fetchone()
+            if row is not None:
+                logger.info(monitor.describe(row))
+
+        error = result.get("error")
+        if error is not None:
+            logger.error(f"Build failed after {format_eta(time.monotonic() - started)}")
+            logger.error(str(error).strip())
+            if index_is_valid(cursor, args.schema, args.index) is False:
+                drop_failed_index(cursor, args.schema, args.index)
+            return False
+        if not index_is_valid(cursor, args.schema, args.index):
+            logger.error(f"Index {args.schema}.{args.index} is not valid after build")
+            return False
+    logger.info(f"Build finished in {format_eta(time.monotonic() - started)}")
+    return True
+
+
+def verify_index(args):
+    connection = connect()
+    with connection.cursor() as cursor:
+        logger.info(f"Verifying {args.schema}.{args.index} with bt_index_check")
+        started = time.monotonic()
+        cursor.execute(
+            "SELECT bt_index_check(%s::regclass, %s)",
+            (f"{args.schema}.{args.index}", args.heapallindexed),
+        )
+    logger.info(f"Verification passed in {format_eta(time.monotonic() - started)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--index", default=DEFAULT_INDEX)
+    parser.add_argument("--table", default=DEFAULT_TABLE)
+    parser.add_argument(
+        "--columns", default=DEFAULT_COLUMNS, help="Comma separated index columns"
+    )
+    parser.add_argument("--schema", default="public")
+    parser.add_argument(
+        "--maintenance-work-mem", help="Session maintenance_work_mem, e.g. 2GB"
+    )
+    parser.add_argument(
+        "--parallel-workers",
+        type=int,
+        help="Session max_parallel_maintenance_workers",
+    )
+    parser.add_argument(
+        "--poll-interval", type=float, default=10.0, help="Seconds between polls"
+    )
+    parser.add_argument(
+        "--no-heapallindexed",
+        dest="heapallindexed",
+        action="store_false",
+        help="Skip the slower check that every heap tuple is in the index",
+    )
+    parser.add_argument("--skip-verify", action="store_true")
+    parser.add_argument(
+        "--cleanup-only",
+        action="store_true",
+        help="Only drop INVALID indexes that are not being built, then exit",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    if args.cleanup_only:
+        with connect().cursor() as cursor:
+            dropped = drop_invalid_indexes(cursor, args.schema, args.table)
+        logger.info(f"Dropped {len(dropped)} invalid indexes: {dropped}")
+        return
+
+    if not run_build(args):
+        sys.exit(1)
+    if not args.skip_verify:
+        try:
+            verify_index(args)
+        except psycopg2.Error as error:
+            logger.error(f"Verification failed: {str(error).strip()}")
+            sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
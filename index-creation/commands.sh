@@ -1,4 +1,10 @@
 #!/bin/bash
 
-nohup bash -c "PGPASSWORD=$DATABASE_PASSWORD psql -U $DATABASE_USER -h $DATABASE_HOST -d $DATABASE_NAME -c 'CREATE INDEX CONCURRENTLY IF NOT EXISTS history_pro_update__9dff21_idx ON history_provideraudithistory(update_kind_id, update_id);'" > create_index.log 2>&1 &
-nohup bash -c "PGPASSWORD=$DATABASE_PASSWORD psql -U $DATABASE_USER -h $DATABASE_HOST -d $DATABASE_NAME -c \"SELECT * FROM bt_index_check('history_pro_update__9dff21_idx', true);\"" > verify_index.log 2>&1 &
+# Builds the index, then verifies it with bt_index_check once the build has succeeded.
+# Progress is logged every --poll-interval seconds; index_progress.sql still works for a manual look.
+nohup python "$(dirname "$0")/build_index.py" \
+    --index history_pro_update__9dff21_idx \
+    --table history_provideraudithistory \
+    --columns update_kind_id,update_id \
+    --maintenance-work-mem 2GB \
+    --parallel-workers 4 > create_index.log 2>&1 &
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""Suggest indexes for a table from its pg_stat_statements workload.
+
+1. Ranks the normalized statements touching the table by total execution
+   time (pg_stat_statements).
+2. For each of the top shapes, picks the table's columns used in equality
+   predicates (most distinct first), then the first range predicate or the
+   ORDER BY columns, and proposes that composite index unless an existing
+   index already starts with the same columns.
+3. With the hypopg extension installed, estimates each proposal's benefit:
+   the generic plan of every statement it serves is EXPLAINed without and
+   with the hypothetical index, and the cost reduction is applied to the
+   statement's total time.
+4. Lists the existing indexes with their size and scan count
+   (pg_stat_user_indexes), flagging unused ones and ones whose columns are a
+   prefix of another index.
+
+The predicate extraction is a regex heuristic over the normalized SQL, so
+the proposals are a starting point for review, not something to apply
+blindly. Connection settings are the same DATABASE_* variables build_index.py
+uses:
+
+    python index_advisor.py --table history_provideraudithistory --top 20
+"""
+
+import argparse
+import json
+import re
+from collections import defaultdict
+
+from build_index import DEFAULT_TABLE, connect
+
+STATEMENTS_QUERY = """
+SELECT queryid, query, calls, {total} AS total_time, {mean} AS mean_time, rows
+FROM pg_stat_statements
+WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+  AND query ~* %s
+ORDER BY {total} DESC
+LIMIT %s
+"""
+
+COLUMNS_QUERY = """
+SELECT a.attname,
+       CASE WHEN s.n_distinct < 0 THEN -s.n_distinct * c.reltuples
+            ELSE s.n_distinct END AS distinct_values
+FROM pg_attribute a
+JOIN pg_class c ON c.oid = a.attrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+LEFT JOIN pg_stats s
+  ON s.schemaname = n.nspname AND s.tablename = c.relname AND s.attname = a.attname
+WHERE c.relname = %s AND n.nspname = %s AND a.attnum > 0 AND NOT a.attisdropped
+"""
+
+INDEXES_QUERY = """
+SELECT ui.indexrelname,
+       ui.idx_scan,
+       pg_relation_size(ui.indexrelid) AS size,
+       pg_size_pretty(pg_relation_size(ui.indexrelid)) AS pretty_size,
+       i.indisunique OR i.indisprimary AS is_unique,
+       array(
+           SELECT a.attname
+           FROM unnest(i.indkey) WITH ORDINALITY AS k(attnum, position)
+           JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+           ORDER BY k.position
+       ) AS columns
+FROM pg_stat_user_indexes ui
+JOIN pg_index i ON i.indexrelid = ui.indexrelid
+WHERE ui.relname = %s AND ui.schemaname = %s
+ORDER BY pg_relation_size(ui.indexrelid) DESC
+"""
+
+_OPERATOR = r"(<>|!=|>=|<=|=|<|>|IN\b|BETWEEN\b)"
+_EXPLAINABLE = ("select", "update", "delete", "with")
+
+
+def time_columns(cursor):
+    """pg_stat_statements renamed total_time/mean_time in PG 13."""
+    cursor.execute(
+        "SELECT 1 FROM information_schema.columns "
+        "WHERE table_name = 'pg_stat_statements' AND column_name = 'total_exec_time'"
+    )
+    if cursor.fetchone():
+        return {"total": "total_exec_time", "mean": "mean_exec_time"}
+    return {"total": "total_time", "mean": "mean_time"}
+
+
+def fetch_statements(cursor, table, top):
+    cursor.execute(
+        STATEMENTS_QUERY.format(**time_columns(cursor)),
+        (rf"\m{re.escape(table)}\M", top),
+    )
+    names = [column[0] for column in cursor.description]
+    return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+def predicate_columns(query, columns):
+    """Split the table's columns used in ``query`` into eq/range/order lists."""
+    lowered = query.lower()
+    where_at = lowered.find(" where ")
+    order_at = lowered.rfind(" order by ")
+    predicates = query[where_at:] if where_at >= 0 else ""
+    if order_at > where_at >= 0:
+        predicates = query[where_at:order_at]
+
+    eq, ranges = [], []
+    for match in re.finditer(rf'(?<![\w$])"?(\w+)"?\s*{_OPERATOR}', predicates, re.I):
+        column, operator = match.group(1), match.group(2).upper()
+        if column not in columns or operator in ("<>", "!="):
+            continue
+        target = eq if operator in ("=", "IN") else ranges
+        if column not in target:
+            target.append(column)
+
+    order = []
+    if order_at >= 0:
+        clause = re.split(r"\b(limit|offset|for)\b", query[order_at + 10 :], 1, re.I)[0]
+        for match in re.finditer(r'"?(\w+)"?\s*(?:asc|desc)?\s*(?:,|$)', clause, re.I):
+            if match.group(1) in columns and match.group(1) not in order:
+                order.append(match.group(1))
+    return eq, [column for column in ranges if column not in eq], order
+
+
+def propose_columns(query, distinct_values):
+    """Return (index columns, number of leading equality columns), or None."""
+    eq, ranges, order = predicate_columns(query, distinct_values)
+    if not eq and not ranges and not order:
+        return None
+    eq.sort(key=lambda column: distinct_values[column] or 0, reverse=True)
+    trailing = [column for column in ranges[:1] or order if column not in eq]
+    return tuple(eq + trailing), len(eq)
+
+
+def covered_by(columns, eq_count, indexes):
+    """Name of an index starting with ``columns``, equality columns in any order."""
+    for index in indexes:
+        existing = index["columns"]
+        if (
+            set(existing[:eq_count]) == set(columns[:eq_count])
+            and tuple(existing[eq_count : len(columns)]) == columns[eq_count:]
+        ):
+            return index["indexrelname"]
+    return None
+
+
+def flag_indexes(indexes):
+    for index in indexes:
+        flags = []
+        if not index["is_unique"] and index["idx_scan"] == 0:
+            flags.append("unused")
+        for other in indexes:
+            if (
+                other is not index
+                and not index["is_unique"]
+                and len(other["columns"]) > len(index["columns"])
+                and other["columns"][: len(index["columns"])] == index["columns"]
+            ):
+                flags.append(f"redundant with {other['indexrelname']}")
+                break
+        index["flags"] = flags
+    return indexes
+
+
+def has_hypopg(cursor):
+    cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'hypopg'")
+    return cursor.fetchone() is not None
+
+
+def generic_plan_cost(cursor, query):
+    """Estimated total cost of the generic plan of a normalized statement.
+
+    pg_stat_statements replaces constants with $n placeholders, so the
+    statement is prepared and its generic plan, which does not depend on
+    the parameter values, is explained with NULLs.
+    """
+    params = max((int(n) for n in re.findall(r"\$(\d+)", query)), default=0)
+    arguments = f"({', '.join(['NULL'] * params)})" if params else ""
+    cursor.execute("SET plan_cache_mode = force_generic_plan")
+    try:
+        cursor.execute(f"PREPARE index_advisor_statement AS {query}")
+        try:
+            cursor.execute(
+                f"EXPLAIN (FORMAT JSON) EXECUTE index_advisor_statement{arguments}"
+            )
+            plan = cursor.fetchone()[0]
+        finally:
+            cursor.execute("DEALLOCATE index_advisor_statement")
+    finally:
+        cursor.execute("RESET plan_cache_mode")
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]["Total Cost"]
+
+
+def estimate_benefit(cursor, schema, table, columns, statements):
+    """Return the estimated time saved (ms) and the plan cost per statement."""
+    definition = "CREATE INDEX ON {}.{} ({})".format(
+        schema, table, ", ".join(f'"{column}"' for column in columns)
+    )
+    saved = 0.0
+    costs = []
+    for statement in statements:
+        if not statement["query"].lstrip().lower().startswith(_EXPLAINABLE):
+            costs.append((statement["queryid"], None, None, "not explainable"))
+            continue
+        try:
+            before = generic_plan_cost(cursor, statement["query"])
+            cursor.execute("SELECT * FROM hypopg_create_index(%s)", (definition,))
+            try:
+                after = generic_plan_cost(cursor, statement["query"])
+            finally:
+                cursor.execute("SELECT hypopg_reset()")
+        except Exception as error:  # statement the planner cannot take on its own
+            costs.append((statement["queryid"], None, None, str(error).strip()))
+            continue
+        costs.append((statement["queryid"], before, after, None))
+        if before > 0 and after < before:
+            saved += statement["total_time"] * (before - after) / before
+    return saved, costs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--table", default=DEFAULT_TABLE)
+    parser.add_argument("--schema", default="public")
+    parser.add_argument("--top", type=int, default=20, help="Query shapes to analyze")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    connection = connect()
+    report = {"table": f"{args.schema}.{args.table}"}
+    with connection.cursor() as cursor:
+        statements = fetch_statements(cursor, args.table, args.top)
+        cursor.execute(COLUMNS_QUERY, (args.table, args.schema))
+        distinct_values = dict(cursor.fetchall())
+        cursor.execute(INDEXES_QUERY, (args.table, args.schema))
+        names = [column[0] for column in cursor.description]
+        indexes = flag_indexes([dict(zip(names, row)) for row in cursor.fetchall()])
+
+        print(f"Top {len(statements)} statements on {report['table']} by total time")
+        print("-" * 78)
+        proposals = defaultdict(list)
+        for rank, statement in enumerate(statements, 1):
+            suggested = propose_columns(statement["query"], distinct_values)
+            statement["proposal"] = suggested and list(suggested[0])
+            print(
+                f"{rank:>3}. {statement['total_time'] / 1000:10.1f}s total "
+                f"{statement['calls']:>10} calls {statement['mean_time']:9.2f}ms mean"
+            )
+            print(f"     {' '.join(statement['query'].split())[:300]}")
+            if suggested:
+                columns, eq_count = suggested
+                covering = covered_by(columns, eq_count, indexes)
+                if covering:
+                    print(f"     served by {covering} {columns}")
+                else:
+                    proposals[columns].append(statement)
+
+        hypopg = has_hypopg(cursor)
+        print("\nProposed indexes")
+        print("-" * 78)
+        if not hypopg:
+            print("(hypopg is not installed; benefits are not estimated)")
+        report["proposals"] = []
+        for columns, served in proposals.items():
+            proposal = {
+                "columns": list(columns),
+                "statements": [statement["queryid"] for statement in served],
+                "total_time_ms": sum(statement["total_time"] for statement in served),
+            }
+            if hypopg:
+                saved, costs = estimate_benefit(
+                    cursor, args.schema, args.table, columns, served
+                )
+                proposal["estimated_saving_ms"] = saved
+                proposal["plan_costs"] = costs
+            report["proposals"].append(proposal)
+        report["proposals"].sort(
+            key=lambda p: p.get("estimated_saving_ms", p["total_time_ms"]),
+            reverse=True,
+        )
+        for proposal in report["proposals"]:
+            line = (
+                f"({', '.join(proposal['columns'])}) for "
+                f"{len(proposal['statements'])} statements, "
+                f"{proposal['total_time_ms'] / 1000:.1f}s total"
+            )
+            if "estimated_saving_ms" in proposal:
+                line += f", est. saving {proposal['estimated_saving_ms'] / 1000:.1f}s"
+            print(line)
+
+    print("\nExisting indexes")
+    print("-" * 78)
+    for index in indexes:
+        flags = f"  [{', '.join(index['flags'])}]" if index["flags"] else ""
+        print(
+            f"{index['indexrelname']:<40} {index['pretty_size']:>10} "
+            f"{index['idx_scan']:>12} scans  ({', '.join(index['columns'])}){flags}"
+        )
+    report["indexes"] = indexes
+    report["statements"] = statements
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""Tests for build_index.py.
+
+The ProgressMonitor tests need nothing but psycopg2. The rest run against a
+real PostgreSQL and are skipped unless the DATABASE_* variables build_index
+connects with are set, e.g.:
+
+    DATABASE_USER=postgres DATABASE_HOST=localhost DATABASE_NAME=postgres \\
+        python -m pytest index-creation/tests
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import build_index  # noqa: E402
+from build_index import ProgressMonitor  # noqa: E402
+
+SCAN = "building index: scanning table"
+SORT = "building index: loading tuples in tree"
+
+
+def row(phase, blocks=(0, 0), tuples=(0, 0), duration="0:00:05"):
+    return phase, blocks[1], blocks[0], tuples[1], tuples[0], duration
+
+
+def test_describe_first_row_has_no_eta():
+    line = ProgressMonitor().describe(row(SCAN, blocks=(10, 100)), now=0)
+    assert line == (
+        f"{SCAN}: blocks 10/100, tuples 0/0, running 0:00:05, 10.0% of phase"
+    )
+
+
+def test_describe_eta_from_phase_rate():
+    monitor = ProgressMonitor()
+    monitor.describe(row(SCAN, blocks=(10, 100)), now=0)
+    # 20 blocks in 10s, 70 left
+    line = monitor.describe(row(SCAN, blocks=(30, 100)), now=10)
+    assert line.endswith("30.0% of phase, phase ETA 0:00:35 (blocks)")
+
+
+def test_describe_no_eta_without_progress():
+    monitor = ProgressMonitor()
+    monitor.describe(row(SCAN, blocks=(10, 100)), now=0)
+    line = monitor.describe(row(SCAN, blocks=(10, 100)), now=10)
+    assert line.endswith("10.0% of phase")
+
+
+def test_describe_phase_change_restarts_eta():
+    monitor = ProgressMonitor()
+    monitor.describe(row(SCAN, blocks=(10, 100)), now=0)
+    monitor.describe(row(SCAN, blocks=(100, 100)), now=100)
+    # The new phase counts tuples; the scan's rate does not carry over
+    line = monitor.describe(row(SORT, tuples=(1000, 10000)), now=110)
+    assert line.endswith("10.0% of phase")
+    line = monitor.describe(row(SORT, tuples=(4000, 10000)), now=120)
+    assert line.endswith("40.0% of phase, phase ETA 0:00:20 (tuples)")
+
+
+def test_describe_eta_over_an_hour():
+    monitor = ProgressMonitor()
+    monitor.describe(row(SCAN, blocks=(0, 100000)), now=0)
+    line = monitor.describe(row(SCAN, blocks=(10, 100000)), now=1)
+    assert line.endswith("phase ETA 2:46:39 (blocks)")
+
+
+def test_describe_without_totals():
+    line = ProgressMonitor().describe(row("initializing"), now=0)
+    assert line == "initializing: blocks 0/0, tuples 0/0, running 0:00:05"
+
+
+requires_database = pytest.mark.skipif(
+    not all(
+        os.environ.get(name)
+        for name in ("DATABASE_USER", "DATABASE_HOST", "DATABASE_NAME")
+    ),
+    reason="DATABASE_USER, DATABASE_HOST and DATABASE_NAME are not set",
+)
+
+
+@pytest.fixture
+def connection():
+    connection = build_index.connect()
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def table(connection):
+    name = f"build_index_test_{os.getpid()}"
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {name}")
+        cursor.execute(
+            f"CREATE TABLE {name} (id serial PRIMARY KEY, kind int, ref int)"
+        )
+        # kind repeats, so a unique index on it fails to build
+        cursor.execute(
+            f"INSERT INTO {name} (kind, ref) "
+            "SELECT g % 7, g % 1000 FROM generate_series(1, 20000) g"
+        )
+    yield name
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {name}")
+
+
+def build_args(table, **overrides):
+    args = argparse.Namespace(
+        index=f"{table}_kind_ref",
+        table=table,
+        columns="kind,ref",
+        schema="public",
+        maintenance_work_mem=None,
+        parallel_workers=None,
+        poll_interval=0.05,
+        heapallindexed=True,
+    )
+    vars(args).update(overrides)
+    return args
+
+
+def index_state(connection, index):
+    with connection.cursor() as cursor:
+        return build_index.index_is_valid(cursor, "public", index)
+
+
+def leave_invalid_index(connection, table, index):
+    """A failed concurrent build, which leaves its index behind INVALID."""
+    with connection.cursor() as cursor:
+        with pytest.raises(psycopg2.errors.UniqueViolation):
+            cursor.execute(
+                f"CREATE UNIQUE INDEX CONCURRENTLY {index} ON {table} (kind)"
+            )
+    assert index_state(connection, index) is False
+
+
+@requires_database
+def test_build_then_verify(connection, table):
+    args = build_args(table)
+    assert build_index.run_build(args)
+    assert index_state(connection, args.index) is True
+    # A valid index is kept as it is
+    assert build_index.run_build(args)
+    assert index_state(connection, args.index) is True
+
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS amcheck")
+        except psycopg2.Error as error:
+            pytest.skip(f"amcheck is not available: {str(error).strip()}")
+    build_index.verify_index(args)
+
+
+@requires_database
+def test_build_replaces_leftover_invalid_index(connection, table):
+    args = build_args(table)
+    leave_invalid_index(connection, table, args.index)
+    assert build_index.run_build(args)
+    assert index_state(connection, args.index) is True
+
+
+@requires_database
+def test_cleanup_drops_leftover_invalid_index(connection, table):
+    index = f"{table}_kind_unique"
+    leave_invalid_index(connection, table, index)
+    with connection.cursor() as cursor:
+        assert build_index.drop_invalid_indexes(cursor, "public", table) == [index]
+    assert index_state(connection, index) is None
+
+
+@pytest.fixture
+def old_snapshot():
+    """An open transaction holding a snapshot but no lock on the table.
+
+    A concurrent build waits for it in "waiting for old snapshots", with its
+    index INVALID, until it ends.
+    """
+    snapshot = build_index.connect()
+    snapshot.autocommit = False
+    snapshot.set_session(isolation_level="REPEATABLE READ")
+    with snapshot.cursor() as cursor:
+        cursor.execute("SELECT 1")
+    yield snapshot
+    snapshot.rollback()
+    snapshot.close()
+
+
+def wait_for_build(connection, table, timeout=30):
+    """Pid of the backend building an index on ``table``.
+
+    Returns once that build is waiting for old snapshots.
+    """
+    deadline = time.monotonic() + timeout
+    with connection.cursor() as cursor:
+        while True:
+            cursor.execute(
+                "SELECT pid, phase FROM pg_stat_progress_create_index "
+                "WHERE relid = %s::regclass",
+                (table,),
+            )
+            build = cursor.fetchone()
+            if build and build[1] == "waiting for old snapshots":
+                return build[0]
+            assert time.monotonic() < deadline, f"build stuck in {build}"
+            time.sleep(0.05)
+
+
+def start(target, *args):
+    result = {}
+    thread = threading.Thread(
+        target=lambda: result.update(value=target(*args)), daemon=True
+    )
+    thread.start()
+    return thread, result
+
+
+@requires_database
+def test_failed_build_drops_its_invalid_index(connection, table, old_snapshot):
+    args = build_args(table)
+    builder, result = start(build_index.run_build, args)
+    pid = wait_for_build(connection, table)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_cancel_backend(%s)", (pid,))
+    builder.join(30)
+    assert result["value"] is False
+    assert index_state(connection, args.index) is None
+
+
+@requires_database
+def test_index_being_built_elsewhere_is_left_alone(connection, table, old_snapshot):
+    args = build_args(table)
+    other = build_index.connect()
+    statement = f"CREATE INDEX CONCURRENTLY {args.index} ON {table} (kind, ref)"
+    builder, result = start(build_index.build_index, other, statement, {})
+    try:
+        pid = wait_for_build(connection, table)
+        assert index_state(connection, args.index) is False
+        with connection.cursor() as cursor:
+            assert build_index.active_build(cursor, "public", args.index) == (
+                pid,
+                "waiting for old snapshots",
+            )
+            assert build_index.drop_invalid_indexes(cursor, "public", table) == []
+        assert build_index.run_build(args) is False
+        assert index_state(connection, args.index) is False
+    finally:
+        old_snapshot.rollback()
+        builder.join(30)
+        other.close()
+    assert result["value"] is None
+    assert index_state(connection, args.index) is True
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for the requirement-kind classifiers in tasks.py.
+
+Builds synthetic DataRequirement/ProviderDataRequirement reports that cover
+every oneof case, then measures requirements classified per second for the
+original if/elif classifiers and the table-driven, memoized ones. Needs the
+generated protobufs (libs.gen) and celery importable, e.g.:
+
+    python benchmark_requirement_kind.py --count 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import tasks
+from libs.gen.completion_pb2 import DataRequirement
+from libs.gen.provider_completion_pb2 import ProviderDataRequirement
+
+TEMPLATE_NAMES = (
+    "Citizenship and Documentation",
+    "Us Citizen",
+    "Review Provider Name Matches",
+    "Verify Provider Name Matches",
+    "Verify Current Employer Using Medallion",
+    "Board Certification",
+    "Residency",
+    "Fellowship",
+    "Internship",
+)
+
+
+def set_oneof(message, case):
+    field = message.DESCRIPTOR.fields_by_name[case]
+    if field.message_type is not None:
+        getattr(message, case).SetInParent()
+    else:
+        setattr(message, case, field.default_value)
+
+
+def oneof_cases(message_type, oneof="requirement"):
+    return [
+        field.name for field in message_type.DESCRIPTOR.oneofs_by_name[oneof].fields
+    ]
+
+
+def requirement_templates_v2():
+    """One DataRequirement per (name, oneof case, nested oneof case)."""
+    templates = []
+    for name in TEMPLATE_NAMES:
+        for case in oneof_cases(DataRequirement):
+            if case == "any_of":
+                alternative_type = type(DataRequirement().provider_requirement)
+                for alternative_case in oneof_cases(alternative_type):
+                    requirement = DataRequirement(name=name)
+                    alternative = requirement.any_of.requirements.add()
+                    set_oneof(alternative.provider_requirement, alternative_case)
+                    templates.append(requirement)
+                continue
+            payload_type = type(getattr(DataRequirement(), case))
+            for payload_case in oneof_cases(payload_type):
+                requirement = DataRequirement(name=name)
+                set_oneof(getattr(requirement, case), payload_case)
+                templates.append(requirement)
+    return templates
+
+
+def requirement_templates_v1():
+    """One ProviderDataRequirement per (name, oneof case, nested oneof case)."""
+    templates = []
+    for name in TEMPLATE_NAMES:
+        for case in oneof_cases(ProviderDataRequirement):
+            if case == "any_of":
+                for alternative_case in oneof_cases(ProviderDataRequirement):
+                    requirement = ProviderDataRequirement(name=name)
+                    alternative = requirement.any_of.requirements.add()
+                    set_oneof(alternative, alternative_case)
+                    templates.append(requirement)
+                continue
+            requirement = ProviderDataRequirement(name=name)
+            payload = getattr(requirement, case, None)
+            payload_descriptor = getattr(payload, "DESCRIPTOR", None)
+            if (
+                payload_descriptor
+                and "requirement" in payload_descriptor.oneofs_by_name
+            ):
+                for payload_case in oneof_cases(type(payload)):
+                    requirement = ProviderDataRequirement(name=name)
+                    set_oneof(getattr(requirement, case), payload_case)
+                    templates.append(requirement)
+            else:
+                set_oneof(requirement, case)
+                templates.append(requirement)
+    return templates
+
+
+def make_requirements(templates, count, seed=0):
+    """Copy ``count`` requirements from ``templates`` with random statuses."""
+    rng = random.Random(seed)
+    message_type = type(templates[0])
+    requirements = []
+    for _ in range(count):
+        requirement = message_type()
+        requirement.CopyFrom(rng.choice(templates))
+        requirement.processing_status = rng.randrange(7)
+        requirements.append(requirement)
+    return requirements
+
+
+def classify_rate(classify, requirements):
+    start = time.perf_counter()
+    for requirement in requirements:
+        classify(requirement)
+    return len(requirements) / (time.perf_counter() - start)
+
+
+# The classifiers as they were before the dispatch tables, kept for comparison.
+def legacy_get_requirement_kind_v2(requirement: DataRequirement) -> str:
+    if requirement.WhichOneof("requirement") == "any_of":
+        if requirement.name == "Citizenship and Documentation":
+            return "citizenship_and_documentation"
+        elif (
+            requirement.any_of.requirements[0].provider_requirement.WhichOneof(
+                "requirement"
+            )
+            == "military_history"
+        ):
+            return "military_history_assignment"
+        elif (
+            requirement.any_of.requirements[0].provider_requirement.WhichOneof(
+                "requirement"
+            )
+            == "us_graduated"
+        ):
+            return "md_us_graduated_or_foreign_certificate"
+        elif (
+            requirement.any_of.requirements[0].provider_requirement.WhichOneof(
+                "requirement"
+            )
+            == "license"
+        ):
+            return "license"
+        elif (
+            requirement.any_of.requirements[0].provider_requirement.WhichOneof(
+                "requirement"
+            )
+            == "exam"
+        ):
+            return "exam"
+        elif (
+            requirement.any_of.requirements[0].provider_requirement.WhichOneof(
+                "requirement"
+            )
+            == "liability_insurance"
+        ):
+            return "group liability_insurance"
+        else:
+            return f"document {requirement.any_of.requirements[0].provider_requirement.document.constraints.matching_kind}"
+    else:
+        if requirement.WhichOneof("requirement") == "provider_requirement":
+            kind = requirement.provider_requirement.WhichOneof("requirement")
+            if kind == "standalone_review":
+                name = requirement.name
+                if name == "Review Provider Name Matches":
+                    return "standalone_provider_name"
+                elif name == "Verify Current Employer Using Medallion":
+                    return "standalone_current_employer"
+                else:
+                    return "standalone_board_certification"
+            elif kind == "medical_program":
+                return f"medical_program {requirement.name}"
+            elif kind == "document":
+                return f"document {requirement.provider_requirement.document.constraints.matching_kind}"
+            elif kind == "practice_start_date":
+                return f"practice {requirement.provider_requirement.practice_start_date.constraints.matching_practice_id.value} practice_start_date"
+            return kind
+        elif requirement.WhichOneof("requirement") == "practice_requirement":
+            requirement_kind = requirement.practice_requirement.WhichOneof(
+                "requirement"
+            )
+            return (
+                f"practice {requirement.principal.practice_id.value} {requirement_kind}"
+            )
+        else:
+            requirement_kind = requirement.group_requirement.WhichOneof("requirement")
+            return f"group {requirement_kind}"
+
+
+def legacy_get_requirement_kind_v1(requirement: ProviderDataRequirement) -> str:
+    if requirement.WhichOneof("requirement") == "any_of":
+        if requirement.name == "Us Citizen":
+            return "citizenship_and_documentation"
+        elif (
+            requirement.any_of.requirements[0].WhichOneof("requirement")
+            == "military_history"
+        ):
+            return "military_history_assignment"
+        elif (
+            requirement.any_of.requirements[0].WhichOneof("requirement")
+            == "us_graduated"
+        ):
+            return "md_us_graduated_or_foreign_certificate"
+        elif requirement.any_of.requirements[0].WhichOneof("requirement") == "license":
+            return "license"
+        elif requirement.any_of.requirements[0].WhichOneof("requirement") == "exam":
+            return "exam"
+        else:
+            return f"document {requirement.any_of.requirements[0].document.constraints.matching_kind}"
+    elif requirement.WhichOneof("requirement") == "standalone_verification":
+        name = requirement.name
+        if name == "Verify Provider Name Matches":
+            return "standalone_provider_name"
+        elif name == "Verify Current Employer Using Medallion":
+            return "standalone_current_employer"
+        else:
+            return "standalone_board_certification"
+    elif requirement.WhichOneof("requirement") == "medical_program":
+        return f"medical_program {requirement.name}"
+    elif requirement.WhichOneof("requirement") == "document":
+        return f"document {requirement.document.constraints.matching_kind}"
+    elif requirement.WhichOneof("requirement") == "related_practice_requirement":
+        requirement_kind = requirement.related_practice_requirement.WhichOneof(
+            "requirement"
+        )
+        if requirement_kind == "start_date":
+            requirement_kind = "practice_start_date"
+        return f"practice {requirement.related_practice_requirement.relation_constraints.practice_id.value} {requirement_kind}"
+    elif requirement.WhichOneof("requirement") == "related_group_requirement":
+        requirement_kind = requirement.related_group_requirement.WhichOneof(
+            "requirement"
+        )
+        return f"group {requirement_kind}"
+    else:
+        return requirement.WhichOneof("requirement")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    for label, templates, legacy, current, cache in (
+        (
+            "v2",
+            requirement_templates_v2(),
+            legacy_get_requirement_kind_v2,
+            tasks.get_requirement_kind_v2,
+            tasks._requirement_kind_cache_v2,
+        ),
+        (
+            "v1",
+            requirement_templates_v1(),
+            legacy_get_requirement_kind_v1,
+            tasks.get_requirement_kind_v1,
+            tasks._requirement_kind_cache_v1,
+        ),
+    ):
+        requirements = make_requirements(templates, args.count, args.seed)
+        mismatched = [
+            template for template in templates if legacy(template) != current(template)
+        ]
+        if mismatched:
+            raise SystemExit(f"{label}: classifiers disagree on {mismatched[0]}")
+
+        legacy_rate = classify_rate(legacy, requirements)
+        tasks.REQUIREMENT_KIND_CACHE_SIZE = 0
+        table_rate = classify_rate(current, requirements)
+        tasks.REQUIREMENT_KIND_CACHE_SIZE = args.cache_size
+        cache.clear()
+        cold_rate = classify_rate(current, requirements)
+        warm_rate = classify_rate(current, requirements)
+        print(
+            f"\n{label} requirement kinds ({len(templates)} templates, {args.count} requirements)"
+        )
+        print("-" * 50)
+        print(f"{'if/elif (before)':<24} {legacy_rate:>14,.0f} req/s")
+        print(f"{'table':<24} {table_rate:>14,.0f} req/s")
+        print(f"{'table, cold cache':<24} {cold_rate:>14,.0f} req/s")
+        print(f"{'table, warm cache':<24} {warm_rate:>14,.0f} req/s")
+        print(f"{'speedup (table)':<24} {table_rate / legacy_rate:>14.2f}x")
+        print(f"{'speedup (warm cache)':<24} {warm_rate / legacy_rate:>14.2f}x")
+
+
+if __name__ == "__main__":
+    main()
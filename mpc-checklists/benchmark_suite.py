@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""Offline benchmarks for the checklist mismatch and export analysis hot paths.
+
+Generates synthetic fixtures at the requested scales and reports throughput
+and peak memory for requirement classification, requirement alignment,
+export parsing, deduplication, the fused dedup-and-parse pipeline and the
+missing-sections diff. Each benchmark runs in a forked child, so its peak
+RSS is measured on its own (protobuf messages live outside the Python heap,
+so tracemalloc would miss most of them). Needs the generated protobufs
+(libs.gen) and celery importable, e.g.:
+
+    python benchmark_suite.py --scale 10k --scale 100k
+    python benchmark_suite.py --scale 1M --compare benchmark-results-<stamp>.json
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import tasks
+from benchmark_requirement_kind import (
+    make_requirements,
+    requirement_templates_v1,
+    requirement_templates_v2,
+)
+from onboarding_analysis.dedup import dedup_csv
+from onboarding_analysis.log_parser import (
+    MESSAGE_COL_INDEX,
+    PROVIDER_DATA_PREFIX,
+    ParseStats,
+    load_provider_map,
+)
+from onboarding_analysis.missing_sections import diff_provider_maps
+from onboarding_analysis.parallel_loader import load_provider_maps
+from onboarding_analysis.pipeline import load_export
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000}
+REQUIREMENTS_PER_CHECKLIST = 20
+
+EXPORT_HEADER = ["date", "host", "service", "message"]
+SECTIONS = {
+    "education": [
+        "Missing Required Education History: Institution for Professional Degree",
+        "Missing Required Education History: Graduation Date",
+        "Missing Required Education History: Degree",
+    ],
+    "work": ["Missing Work History: Gap Explanation", "Missing Work History: Employer"],
+    "license": ["Missing License: State", "Missing License: Expiration Date"],
+    "documents": ["Missing Document: CV", "Missing Document: Photo ID"],
+}
+
+
+# Fixtures
+
+
+def provider_id(n):
+    return f"{n:08x}-0000-4000-8000-{n:012x}"
+
+
+def random_missing_sections(rng):
+    missing_sections = {}
+    for section, fields in SECTIONS.items():
+        chosen = [field for field in fields if rng.random() < 0.4]
+        if chosen and rng.random() < 0.2:
+            # Some sections are logged with nested lists
+            chosen = [chosen[:1], *chosen[1:]]
+        missing_sections[section] = chosen
+    return missing_sections
+
+
+def export_message(pid, percent_complete, missing_sections):
+    payload = json.dumps(
+        {"percent_complete": percent_complete, "missing_sections": missing_sections}
+    )
+    return f"[ONBOARDING-AGGREGATE] {PROVIDER_DATA_PREFIX}{pid}: {payload}\n"
+
+
+def malformed_message(rng, pid):
+    return rng.choice(
+        (
+            f'[ONBOARDING-AGGREGATE] {PROVIDER_DATA_PREFIX}{pid}: {{"percent_complete": ',
+            f"[ONBOARDING-AGGREGATE] {PROVIDER_DATA_PREFIX}{pid}: not json",
+            "[ONBOARDING-AGGREGATE] Progress: 300 / 1000",
+        )
+    )
+
+
+def write_exports(
+    directory, rows, seed=0, duplicate_rate=0.1, malformed_rate=0.01, changed_rate=0.3
+):
+    """Write before.csv and after.csv with ``rows`` rows each.
+
+    About ``duplicate_rate`` of the rows repeat an earlier message verbatim
+    and ``malformed_rate`` are malformed. Both exports cover the same
+    providers, with ``changed_rate`` of them changing their missing sections.
+    """
+    rng = random.Random(seed)
+    before = [random_missing_sections(rng) for _ in range(rows)]
+    after = [
+        random_missing_sections(rng) if rng.random() < changed_rate else sections
+        for sections in before
+    ]
+    paths = []
+    for name, missing in (("before.csv", before), ("after.csv", after)):
+        path = os.path.join(directory, name)
+        written = []
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(EXPORT_HEADER)
+            for n in range(rows):
+                roll = rng.random()
+                if roll < duplicate_rate and written:
+                    message = rng.choice(written)
+                elif roll < duplicate_rate + malformed_rate:
+                    message = malformed_message(rng, provider_id(n))
+                else:
+                    pid = provider_id(n)
+                    sections = missing[n]
+                    percent_complete = 100 - 5 * sum(map(len, sections.values()))
+                    message = export_message(pid, percent_complete, sections)
+                    written.append(message)
+                writer.writerow(["2025-01-01", "host", "onboarding", message])
+        paths.append(path)
+    return paths
+
+
+def make_checklist_pairs(count, seed=0):
+    """Split ``count`` v1 and v2 requirements into per-checklist report pairs."""
+    requirements_v1 = make_requirements(requirement_templates_v1(), count, seed)
+    requirements_v2 = make_requirements(requirement_templates_v2(), count, seed + 1)
+    return [
+        (
+            requirements_v1[start : start + REQUIREMENTS_PER_CHECKLIST],
+            requirements_v2[start : start + REQUIREMENTS_PER_CHECKLIST],
+        )
+        for start in range(0, count, REQUIREMENTS_PER_CHECKLIST)
+    ]
+
+
+# Benchmarks. Each takes (count, fixtures) and returns (setup, run): setup
+# builds the in-memory inputs untimed, run processes them and returns the
+# number of items it handled.
+
+
+def bench_classify(templates, classify):
+    def benchmark(count, fixtures):
+        def setup():
+            return make_requirements(templates(), count)
+
+        def run(requirements):
+            for requirement in requirements:
+                classify(requirement)
+            return len(requirements)
+
+        return setup, run
+
+    return benchmark
+
+
+def bench_align(count, fixtures):
+    def run(pairs):
+        for requirements_v1, requirements_v2 in pairs:
+            tasks.align_requirements(requirements_v1, requirements_v2)
+        return count
+
+    return (lambda: make_checklist_pairs(count)), run
+
+
+def bench_parse(count, fixtures):
+    def run(_):
+        stats = ParseStats()
+        load_provider_map(fixtures["before"], MESSAGE_COL_INDEX, stats)
+        return stats.rows
+
+    return (lambda: None), run
+
+
+def bench_parse_parallel(count, fixtures):
+    def run(_):
+        ((_, stats),) = load_provider_maps([fixtures["before"]])
+        return stats.rows
+
+    return (lambda: None), run
+
+
+def bench_dedup(count, fixtures):
+    def run(output_path):
+        _, _, stats = dedup_csv(fixtures["before"], output_path, MESSAGE_COL_INDEX)
+        return stats.rows
+
+    return (lambda: os.path.join(fixtures["directory"], "deduped.csv")), run
+
+
+def bench_dedup_parse(count, fixtures):
+    def run(_):
+        _, _, dedup_stats = load_export(fixtures["before"])
+        return dedup_stats.rows
+
+    return (lambda: None), run
+
+
+def bench_diff(count, fixtures):
+    def setup():
+        return (
+            load_provider_map(fixtures["before"]),
+            load_provider_map(fixtures["after"]),
+        )
+
+    def run(maps):
+        before_map, after_map = maps
+        diff_provider_maps(before_map, after_map)
+        return len(before_map.keys() & after_map.keys())
+
+    return setup, run
+
+
+BENCHMARKS = {
+    "classify_v2": (
+        bench_classify(requirement_templates_v2, tasks.get_requirement_kind_v2),
+        "requirements",
+    ),
+    "classify_v1": (
+        bench_classify(requirement_templates_v1, tasks.get_requirement_kind_v1),
+        "requirements",
+    ),
+    "align": (bench_align, "requirements"),
+    "parse": (bench_parse, "rows"),
+    "parse_parallel": (bench_parse_parallel, "rows"),
+    "dedup": (bench_dedup, "rows"),
+    "dedup_parse": (bench_dedup_parse, "rows"),
+    "diff": (bench_diff, "providers"),
+}
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _measure(name, count, fixtures, conn):
+    setup, run = BENCHMARKS[name][0](count, fixtures)
+    data = setup()
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    items = run(data)
+    seconds = time.perf_counter() - start
+    peak = peak_rss_mb()
+    conn.send(
+        {
+            "items": items,
+            "seconds": seconds,
+            "peak_rss_mb": round(peak, 1),
+            "run_rss_mb": round(max(peak - baseline, 0.0), 1),
+        }
+    )
+    conn.close()
+
+
+def measure(name, count, fixtures):
+    """Run one benchmark in a forked child and return its measurements."""
+    context = multiprocessing.get_context("fork")
+    parent, child = context.Pipe(duplex=False)
+    process = context.Process(target=_measure, args=(name, count, fixtures, child))
+    process.start()
+    child.close()
+    result = parent.recv()
+    process.join()
+    return result
+
+
+def load_previous(path):
+    with open(path) as f:
+        return {
+            (result["benchmark"], result["scale"]): result
+            for result in json.load(f)["results"]
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scale",
+        action="append",
+        choices=list(SCALES),
+        help="Fixture scale; repeat for several (default: 10k)",
+    )
+    parser.add_argument(
+        "--benchmark",
+        action="append",
+        choices=list(BENCHMARKS),
+        help="Benchmark to run; repeat for several (default: all)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output",
+        default=time.strftime("benchmark-results-%Y%m%d-%H%M%S.json"),
+        help="JSON file the results are written to",
+    )
+    parser.add_argument("--compare", help="Results file of an earlier run")
+    parser.add_argument(
+        "--keep-fixtures", help="Write the export fixtures to this directory"
+    )
+    args = parser.parse_args()
+
+    scales = args.scale or ["10k"]
+    names = args.benchmark or list(BENCHMARKS)
+    previous = load_previous(args.compare) if args.compare else {}
+
+    results = []
+    print(
+        f"{'benchmark':<16} {'scale':>6} {'items/s':>14} {'seconds':>9} "
+        f"{'peak MB':>9} {'run MB':>8} {'vs prev':>8}"
+    )
+    print("-" * 76)
+    for scale in scales:
+        count = SCALES[scale]
+        directory = args.keep_fixtures or tempfile.mkdtemp(prefix="benchmark-")
+        os.makedirs(directory, exist_ok=True)
+        try:
+            before, after = write_exports(directory, count, args.seed)
+            fixtures = {"directory": directory, "before": before, "after": after}
+            for name in names:
+                result = measure(name, count, fixtures)
+                rate = result["items"] / result["seconds"]
+                result.update(
+                    benchmark=name,
+                    scale=scale,
+                    unit=BENCHMARKS[name][1],
+                    rate=round(rate, 1),
+                )
+                results.append(result)
+                earlier = previous.get((name, scale))
+                ratio = f"{rate / earlier['rate']:.2f}x" if earlier else ""
+                print(
+                    f"{name:<16} {scale:>6} {rate:>14,.0f} {result['seconds']:>9.2f} "
+                    f"{result['peak_rss_mb']:>9.1f} {result['run_rss_mb']:>8.1f} "
+                    f"{ratio:>8}"
+                )
+        finally:
+            if not args.keep_fixtures:
+                shutil.rmtree(directory)
+
+    with open(args.output, "w") as f:
+        json.dump(
+            {
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+                "seed": args.seed,
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
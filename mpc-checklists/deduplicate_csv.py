@@ -1,39 +1,35 @@
 #!/usr/bin/env python3
-import csv
+import argparse
+import os
+import sys
 
-# Input and output file paths
-input_file = "after.csv"
-output_file = "after_deduped.csv"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from onboarding_analysis.dedup import DEFAULT_MEMORY_MB, DEFAULT_PARTITIONS, dedup_csv
 
+parser = argparse.ArgumentParser(description="Globally deduplicate a CSV log export on one column.")
+parser.add_argument("input_file", nargs="?", default="after.csv")
+parser.add_argument("output_file", nargs="?", default="after_deduped.csv")
 # Message is in the 4th column (index 3)
-MESSAGE_COL_INDEX = 3
-
-# Read the CSV file
-with open(input_file, 'r', newline='') as csvfile:
-    reader = csv.reader(csvfile)
-    header = next(reader)  # Save the header
-    rows = list(reader)    # Read all rows
-
-print(f"Read {len(rows)} rows from {input_file}")
-print(f"Using column {header[MESSAGE_COL_INDEX]} as the message column")
-
-# Global deduplication - remove all duplicates regardless of position
-seen_messages = set()
-deduped_rows = []
-
-for row in rows:
-    message = row[MESSAGE_COL_INDEX]
-    if message not in seen_messages:
-        seen_messages.add(message)
-        deduped_rows.append(row)
-
-print(f"Removed {len(rows) - len(deduped_rows)} duplicate rows (global deduplication)")
-print(f"Remaining rows: {len(deduped_rows)}")
-
-# Write the deduplicated data to the output file
-with open(output_file, 'w', newline='') as csvfile:
-    writer = csv.writer(csvfile)
-    writer.writerow(header)  # Write the header
-    writer.writerows(deduped_rows)
-
-print(f"Deduplicated data written to {output_file}")
+parser.add_argument("--key-column", default="3", help="Column index or header name to deduplicate on")
+parser.add_argument(
+    "--memory-mb",
+    type=int,
+    default=DEFAULT_MEMORY_MB,
+    help="Memory budget for key digests before spilling to disk",
+)
+parser.add_argument("--partitions", type=int, default=DEFAULT_PARTITIONS, help="Hash partitions used when spilling")
+args = parser.parse_args()
+
+# Global deduplication - remove all duplicates regardless of position, streaming
+# rows to the output and keeping only a 16-byte digest of each message
+header, key_index, stats = dedup_csv(
+    args.input_file, args.output_file, args.key_column, args.memory_mb, args.partitions
+)
+
+print(f"Read {stats.rows} rows from {args.input_file}")
+print(f"Using column {header[key_index]} as the message column")
+if stats.spilled:
+    print(f"Digest memory budget exceeded, spilled to {args.partitions} partitions on disk")
+print(f"Removed {stats.duplicates} duplicate rows (global deduplication)")
+print(f"Remaining rows: {stats.unique}")
+print(f"Deduplicated data written to {args.output_file}")
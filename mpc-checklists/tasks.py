@@ -1,6 +1,12 @@
+import functools
+import json
 import logging
+import os
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from typing import Iterable, List, NamedTuple, Set
 
-from celery import shared_task
+from celery import chord, shared_task
 
 from libs.gen.completion_pb2 import DataRequirement
 from libs.gen.provider_completion_pb2 import ProviderDataRequirement
@@ -8,256 +14,809 @@ from libs.gen.provider_completion_pb2 import ProviderDataRequirement
 logger = logging.getLogger(__name__)
 
 
-@shared_task()
-def task_compute_checklist_mismatch():
-    from apps.checklists.models import Checklist
-    from apps.core.helpers import chunked_queryset
+def profiled(func):
+    """``onboarding_analysis.profiling.profiled``, imported on the first call.
+
+    Like the other onboarding_analysis imports in this module, it is not
+    imported at module level, so importing tasks does not need the repo root
+    on sys.path.
+    """
+    wrapped = None
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        nonlocal wrapped
+        if wrapped is None:
+            from onboarding_analysis.profiling import profiled as profile_task
+
+            wrapped = profile_task(func)
+        return wrapped(*args, **kwargs)
+
+    return wrapper
+
+
+def keyset_chunked_queryset(queryset, chunk_size=500):
+    """Yield lists of rows from ``queryset`` in id order, ``chunk_size`` at a time.
+
+    Each chunk is fetched with ``id > last_id`` instead of an OFFSET, so the
+    cost per chunk stays flat however deep into the table the scan is, and
+    rows are never repeated or skipped between chunks.
+    """
+    queryset = queryset.order_by("id")
+    last_id = None
+    while True:
+        page = queryset if last_id is None else queryset.filter(id__gt=last_id)
+        chunk = list(page[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1].id
+
+
+def iter_checklist_pairs(
+    checklists, missing, chunk_size=500, chunker=keyset_chunked_queryset, timer=None
+):
+    """Yield (checklist, provider_checklist) pairs for a Checklist queryset.
+
+    ProviderChecklists are fetched with one unique_key__in query per chunk
+    instead of one query per checklist. When several share a unique_key, the
+    one with the highest id is used, as in iter_summary_rows. Checklists
+    without a matching ProviderChecklist are appended to ``missing`` and
+    skipped.
+    """
     from apps.providers.models import ProviderChecklist
+    from onboarding_analysis.progress import PhaseTimer
 
-    logger.info("[COMPUTE CHECKLIST MISMATCH] Starting")
-    checklists = Checklist.objects.prefetch_related(
-        "providers__user__org_memberships"
-    ).filter(
-        unique_key__startswith="pe-intake-",
-        deleted__isnull=True,
-        providers__user__org_memberships__is_active=True,
-    )
-    processed, total = 1, checklists.count()
-    match, mismatch = 0, 0
-    for chunk in chunked_queryset(checklists, 500):
+    timer = timer or PhaseTimer()
+    chunks = iter(chunker(checklists, chunk_size))
+    while True:
+        with timer.phase("db_fetch"):
+            chunk = next(chunks, None)
+            if chunk is None:
+                return
+            provider_checklists = {
+                pc.unique_key: pc
+                for pc in ProviderChecklist.objects.filter(
+                    unique_key__in={cl.unique_key for cl in chunk}
+                ).order_by("id")
+            }
         for cl in chunk:
-            logger.info(
-                f"[COMPUTE CHECKLIST MISMATCH] Processing checklist {cl.id}: {processed}/{total}"
-            )
-            provider_checklist = ProviderChecklist.objects.get(unique_key=cl.unique_key)
-            if (
-                cl.percent_complete
-                != provider_checklist.primitive().latest_report.percent_complete
-            ):
-                mismatch += 1
-            else:
-                match += 1
-            processed += 1
-    logger.info(f"[COMPUTE CHECKLIST MISMATCH] Match: {match}, Mismatch: {mismatch}")
+            provider_checklist = provider_checklists.get(cl.unique_key)
+            if provider_checklist is None:
+                missing.append(cl.id)
+                continue
+            yield cl, provider_checklist
 
 
-@shared_task()
-def task_compute_checklist_mismatch_avoid_has_mismatching_related_object():
+class LatestReportCache:
+    """Bounded LRU cache of decoded ``primitive().latest_report`` values.
+
+    This is the report source the analyzers read through: ``get`` returns
+    the report of a Checklist or ProviderChecklist, and
+    ``requirement_kind_v1``/``requirement_kind_v2`` the kind of one of its
+    requirements.
+
+    Entries are keyed by model, primary key and report version (the
+    ``modified`` timestamp when the model has one), so a report that changes
+    mid-run is decoded again instead of being served stale.
+    """
+
+    def __init__(self, maxsize=4096, version_attr="modified", timer=None):
+        from onboarding_analysis.progress import PhaseTimer
+
+        self.maxsize = maxsize
+        self.version_attr = version_attr
+        self.timer = timer or PhaseTimer()
+        self.hits = 0
+        self.misses = 0
+        self._reports = OrderedDict()
+
+    def get(self, obj):
+        key = (
+            obj._meta.label,
+            obj.pk,
+            getattr(obj, self.version_attr, None),
+        )
+        report = self._reports.get(key)
+        if report is not None:
+            self.hits += 1
+            self._reports.move_to_end(key)
+            return report
+        self.misses += 1
+        with self.timer.phase("decode"):
+            report = obj.primitive().latest_report
+        self._reports[key] = report
+        if len(self._reports) > self.maxsize:
+            self._reports.popitem(last=False)
+        return report
+
+    def requirement_kind_v1(self, requirement):
+        return get_requirement_kind_v1(requirement)
+
+    def requirement_kind_v2(self, requirement):
+        return get_requirement_kind_v2(requirement)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups * 100 if lookups else 0
+        return f"hits={self.hits} misses={self.misses} hit_rate={hit_rate:.1f}%"
+
+
+def get_pe_intake_checklists():
+    """Active pe-intake checklists, each exactly once.
+
+    The active membership check is an EXISTS subquery rather than a join,
+    which would return a checklist once per matching provider membership.
+    """
     from apps.checklists.models import Checklist
-    from apps.core.helpers import chunked_queryset
-    from apps.providers.models import ProviderChecklist
+    from django.db.models import Exists, OuterRef
 
-    logger.info("[COMPUTE CHECKLIST MISMATCH] Starting related object check")
-    checklists = Checklist.objects.prefetch_related(
-        "providers__user__org_memberships"
-    ).filter(
+    active_membership = Checklist.objects.filter(
+        pk=OuterRef("pk"),
+        providers__user__org_memberships__is_active=True,
+    )
+    return Checklist.objects.filter(
+        Exists(active_membership),
         unique_key__startswith="pe-intake-",
         deleted__isnull=True,
-        providers__user__org_memberships__is_active=True,
     )
-    processed, total = 1, checklists.count()
-    match, mismatch = 0, 0
-    for chunk in chunked_queryset(checklists, 500):
-        for cl in chunk:
-            logger.info(
-                f"[COMPUTE CHECKLIST MISMATCH FILTER] Processing checklist {cl.id}: {processed}/{total}"
-            )
-            provider_checklist = ProviderChecklist.objects.get(unique_key=cl.unique_key)
-            processed_requirements = (
-                provider_checklist.primitive().latest_report.processed_requirements
+
+
+def has_mismatching_related_object(report) -> bool:
+    return any(req.processing_status == 5 for req in report.processed_requirements)
+
+
+def merge_id_lists(result, other):
+    merged = {k: list(v) for k, v in result.items()}
+    for k, v in other.items():
+        merged.setdefault(k, []).extend(v)
+    return merged
+
+
+class MismatchAnalyzer:
+    """Base class for the per-checklist mismatch breakdowns.
+
+    ``entry`` computes the small JSON-serializable contribution of a single
+    checklist and ``add_entry`` folds it into the running aggregate, so the
+    incremental task can store entries per checklist and rebuild the
+    aggregate without re-reading unchanged reports.
+    """
+
+    name = None
+
+    def entry(self, cl, provider_checklist, reports):
+        raise NotImplementedError
+
+    def add_entry(self, cl_id, entry):
+        raise NotImplementedError
+
+    def observe(self, cl, provider_checklist, reports):
+        self.add_entry(cl.id, self.entry(cl, provider_checklist, reports))
+
+
+class MatchAnalyzer(MismatchAnalyzer):
+    """Counts checklists whose percent_complete matches the v1 report."""
+
+    name = "match"
+    skip_mismatching_related_object = False
+
+    def __init__(self):
+        self.match = 0
+        self.mismatch = 0
+
+    def entry(self, cl, provider_checklist, reports):
+        report = reports.get(provider_checklist)
+        if self.skip_mismatching_related_object and has_mismatching_related_object(
+            report
+        ):
+            return None
+        if cl.percent_complete != report.percent_complete:
+            return "mismatch"
+        return "match"
+
+    def add_entry(self, cl_id, entry):
+        if entry == "mismatch":
+            self.mismatch += 1
+        elif entry == "match":
+            self.match += 1
+
+    def result(self):
+        return {"match": self.match, "mismatch": self.mismatch}
+
+    @staticmethod
+    def merge_results(result, other):
+        return {k: result[k] + other[k] for k in ("match", "mismatch")}
+
+    @staticmethod
+    def log_result(result, prefix):
+        logger.info(
+            f"{prefix} Match: {result['match']}, Mismatch: {result['mismatch']}"
+        )
+
+
+class FilteredMatchAnalyzer(MatchAnalyzer):
+    """Same as MatchAnalyzer, ignoring checklists with a mismatching related object."""
+
+    name = "match_filtered"
+    skip_mismatching_related_object = True
+
+
+class PercentDiffAnalyzer(MismatchAnalyzer):
+    """Buckets mismatching checklist IDs by their percent_complete difference."""
+
+    name = "percent_diff"
+
+    def __init__(self):
+        from onboarding_analysis.histogram import PERCENT_DIFF_HISTOGRAM
+
+        self.histogram = PERCENT_DIFF_HISTOGRAM
+        self.buckets = {label: [] for label in self.histogram.labels}
+
+    def entry(self, cl, provider_checklist, reports):
+        report = reports.get(provider_checklist)
+        if has_mismatching_related_object(report):
+            return None
+        if cl.percent_complete != report.percent_complete:
+            diff = abs(cl.percent_complete - report.percent_complete)
+            bucket = self.histogram.bucket(diff)
+            if bucket is not None:
+                return self.histogram.labels[bucket]
+        return None
+
+    def add_entry(self, cl_id, entry):
+        if entry is not None:
+            self.buckets[entry].append(cl_id)
+
+    def result(self):
+        return dict(self.buckets)
+
+    @staticmethod
+    def merge_results(result, other):
+        return merge_id_lists(result, other)
+
+    @staticmethod
+    def log_result(result, prefix):
+        for k, v in result.items():
+            logger.info(f"{prefix} {k}: {v}")
+            logger.info(f"{prefix} {k}: {len(v)}")
+
+
+class RequirementKindAnalyzer(MismatchAnalyzer):
+    """Collects mismatching checklist IDs per requirement kind."""
+
+    name = "requirement_kind"
+
+    def __init__(self):
+        self.kinds = defaultdict(list)
+
+    def entry(self, cl, provider_checklist, reports):
+        report_v1 = reports.get(provider_checklist)
+        processed_requirements_v1 = report_v1.processed_requirements
+        if has_mismatching_related_object(report_v1):
+            return []
+        if cl.percent_complete != report_v1.percent_complete:
+            alignment = align_requirements(
+                processed_requirements_v1,
+                reports.get(cl).processed_requirements,
+                reports.requirement_kind_v1,
+                reports.requirement_kind_v2,
             )
-            if any(req.processing_status == 5 for req in processed_requirements):
-                continue
-            if (
-                cl.percent_complete
-                != provider_checklist.primitive().latest_report.percent_complete
-            ):
-                mismatch += 1
-            else:
-                match += 1
-            processed += 1
-    logger.info(
-        f"[COMPUTE CHECKLIST MISMATCH FILTER] Match: {match}, Mismatch: {mismatch}"
+            return alignment.mismatched
+        return []
+
+    def add_entry(self, cl_id, entry):
+        for kind in entry:
+            self.kinds[kind].append(cl_id)
+
+    def result(self):
+        return dict(self.kinds)
+
+    @staticmethod
+    def merge_results(result, other):
+        return merge_id_lists(result, other)
+
+    @staticmethod
+    def log_result(result, prefix):
+        for k, v in result.items():
+            logger.info(f"{prefix} {k}: {v}")
+            logger.info(f"{prefix} {k}: {len(v)}")
+
+
+MISMATCH_ANALYZERS = {
+    analyzer.name: analyzer
+    for analyzer in (
+        MatchAnalyzer,
+        FilteredMatchAnalyzer,
+        PercentDiffAnalyzer,
+        RequirementKindAnalyzer,
     )
+}
 
 
-@shared_task()
-def task_compute_checklist_mismatch_percent():
-    from apps.checklists.models import Checklist
-    from apps.core.helpers import chunked_queryset
+# Phase timings go out as <metric>.seconds / <metric>.calls tagged with phase
+MISMATCH_PHASE_METRIC = "checklist_mismatch.phase"
+
+
+def run_mismatch_analysis(
+    analyzer_names, prefix, checklists=None, chunker=keyset_chunked_queryset
+):
+    """Run the given analyzers over one pass of checklist/provider checklist pairs.
+
+    Returns a JSON-serializable dict with the pass bookkeeping and one result
+    per analyzer under ``results``.
+    """
+    from onboarding_analysis.progress import PhaseTimer, ProgressReporter
+
+    if checklists is None:
+        checklists = get_pe_intake_checklists()
+    analyzers = [MISMATCH_ANALYZERS[name]() for name in analyzer_names]
+    timer = PhaseTimer()
+    with timer.phase("db_count"):
+        progress = ProgressReporter(logger, prefix, total=checklists.count())
+    missing = []
+    reports = LatestReportCache(timer=timer)
+    for cl, provider_checklist in iter_checklist_pairs(
+        checklists, missing, chunker=chunker, timer=timer
+    ):
+        for analyzer in analyzers:
+            with timer.phase(analyzer.name):
+                analyzer.observe(cl, provider_checklist, reports)
+        progress.advance()
+    progress.finish()
+    logger.info(f"{prefix} Missing provider checklist: {len(missing)} {missing}")
+    logger.info(f"{prefix} Report cache: {reports.stats()}")
+    timer.emit(logger, prefix, MISMATCH_PHASE_METRIC)
+    return {
+        "processed": progress.count,
+        "missing": missing,
+        "results": {analyzer.name: analyzer.result() for analyzer in analyzers},
+    }
+
+
+def log_mismatch_results(results, prefix):
+    for name, result in results.items():
+        MISMATCH_ANALYZERS[name].log_result(result, prefix)
+
+
+def merge_mismatch_analyses(analyses):
+    """Merge run_mismatch_analysis results from disjoint sets of checklists."""
+    merged = {"processed": 0, "missing": [], "results": {}}
+    for analysis in analyses:
+        merged["processed"] += analysis["processed"]
+        merged["missing"].extend(analysis["missing"])
+        for name, result in analysis["results"].items():
+            if name in merged["results"]:
+                result = MISMATCH_ANALYZERS[name].merge_results(
+                    merged["results"][name], result
+                )
+            merged["results"][name] = result
+    return merged
+
+
+MISMATCH_STATE_PATH_ENV = "CHECKLIST_MISMATCH_STATE_PATH"
+MISMATCH_STATE_CACHE_KEY = "checklist_mismatch_state"
+# Bumped by every save of a Checklist or ProviderChecklist, including a new report
+MISMATCH_WATERMARK_FIELD = "modified"
+
+
+class FileMismatchState:
+    """Incremental mismatch state in a JSON file every worker can reach."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __str__(self):
+        return self.path
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, state):
+        # Written aside and renamed, so a crashed run leaves the previous state
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+
+class CacheMismatchState:
+    """Incremental mismatch state in the Django cache, stored without expiry."""
+
+    def __init__(self, cache, key=MISMATCH_STATE_CACHE_KEY):
+        self.cache = cache
+        self.key = key
+
+    def __str__(self):
+        return f"cache key {self.key}"
+
+    def load(self):
+        return self.cache.get(self.key)
+
+    def save(self, state):
+        self.cache.set(self.key, state, timeout=None)
+
+
+def get_mismatch_state():
+    """Where the incremental mismatch state is kept.
+
+    Runs land on whichever worker picks them up, so the state must be shared
+    by all of them: a file at $CHECKLIST_MISMATCH_STATE_PATH on shared
+    storage, or else the default Django cache. A cache that only lives in
+    the worker process is refused, since every run would then start from
+    scratch.
+    """
+    from django.core.cache import caches
+    from django.core.cache.backends.dummy import DummyCache
+    from django.core.cache.backends.locmem import LocMemCache
+    from django.core.exceptions import ImproperlyConfigured
+
+    path = os.environ.get(MISMATCH_STATE_PATH_ENV)
+    if path:
+        return FileMismatchState(path)
+    cache = caches["default"]
+    if isinstance(cache, (DummyCache, LocMemCache)):
+        raise ImproperlyConfigured(
+            f"The default cache ({type(cache).__name__}) is not shared between "
+            f"workers. Set ${MISMATCH_STATE_PATH_ENV} to a path on storage shared "
+            "by all workers, or configure a shared cache backend."
+        )
+    return CacheMismatchState(cache)
+
+
+def get_changed_checklists(checklists, since, new_ids):
+    """Checklists whose own or ProviderChecklist report changed after ``since``."""
     from apps.providers.models import ProviderChecklist
+    from django.db.models import Q
 
-    logger.info("[COMPUTE CHECKLIST MISMATCH PERCENT] Starting")
-    checklists = Checklist.objects.prefetch_related(
-        "providers__user__org_memberships"
-    ).filter(
-        unique_key__startswith="pe-intake-",
-        deleted__isnull=True,
-        providers__user__org_memberships__is_active=True,
+    changed_after = {f"{MISMATCH_WATERMARK_FIELD}__gt": since}
+    changed_keys = ProviderChecklist.objects.filter(**changed_after).values(
+        "unique_key"
     )
-    processed, total = 1, checklists.count()
-    map = {
-        range(3): [],
-        range(3, 5): [],
-        range(5, 10): [],
-        range(10, 20): [],
-        range(20, 30): [],
-        range(30, 40): [],
-        range(40, 50): [],
-        range(50, 60): [],
-        range(60, 70): [],
-        range(70, 80): [],
-        range(80, 90): [],
-        range(90, 101): [],
+    return checklists.filter(
+        Q(**changed_after) | Q(unique_key__in=changed_keys) | Q(id__in=new_ids)
+    )
+
+
+def collect_mismatch_entries(
+    analyzer_names, checklists, prefix, chunker=keyset_chunked_queryset
+):
+    """Per-checklist analyzer entries, keyed by checklist id.
+
+    Checklists without a ProviderChecklist get a None entry, so they are
+    still reported as missing until a ProviderChecklist shows up.
+    """
+    from onboarding_analysis.progress import PhaseTimer, ProgressReporter
+
+    analyzers = [MISMATCH_ANALYZERS[name]() for name in analyzer_names]
+    timer = PhaseTimer()
+    progress = ProgressReporter(logger, prefix)
+    entries = {}
+    missing = []
+    reports = LatestReportCache(timer=timer)
+    for cl, provider_checklist in iter_checklist_pairs(
+        checklists, missing, chunker=chunker, timer=timer
+    ):
+        entry = {}
+        for analyzer in analyzers:
+            with timer.phase(analyzer.name):
+                entry[analyzer.name] = analyzer.entry(cl, provider_checklist, reports)
+        entries[str(cl.id)] = entry
+        progress.advance()
+    progress.finish()
+    timer.emit(logger, prefix, MISMATCH_PHASE_METRIC)
+    for cl_id in missing:
+        entries[str(cl_id)] = None
+    return entries
+
+
+def summarize_mismatch_entries(analyzer_names, entries):
+    """Fold stored entries into the same shape run_mismatch_analysis returns."""
+    analyzers = [MISMATCH_ANALYZERS[name]() for name in analyzer_names]
+    missing = []
+    for cl_id, entry in entries.items():
+        if entry is None:
+            missing.append(cl_id)
+            continue
+        for analyzer in analyzers:
+            analyzer.add_entry(cl_id, entry[analyzer.name])
+    return {
+        "processed": len(entries) - len(missing),
+        "missing": missing,
+        "results": {analyzer.name: analyzer.result() for analyzer in analyzers},
     }
-    for chunk in chunked_queryset(checklists, 500):
-        for cl in chunk:
-            logger.info(
-                f"[COMPUTE CHECKLIST MISMATCH PERCENT] Processing checklist {cl.id}: {processed}/{total}"
-            )
-            provider_checklist = ProviderChecklist.objects.get(unique_key=cl.unique_key)
-            processed_requirements = (
-                provider_checklist.primitive().latest_report.processed_requirements
-            )
-            if any(req.processing_status == 5 for req in processed_requirements):
-                continue
-            if (
-                cl.percent_complete
-                != provider_checklist.primitive().latest_report.percent_complete
-            ):
-                diff = abs(
-                    cl.percent_complete
-                    - provider_checklist.primitive().latest_report.percent_complete
-                )
-                for k, v in map.items():
-                    if diff in k:
-                        map[k].append(cl.id)
-                        break
-            processed += 1
-    for k, v in map.items():
-        # k is a range, so we need to convert it to a string
-        k = f"{k.start}-{k.stop}"
-        logger.info(f"[COMPUTE CHECKLIST MISMATCH PERCENT] {k}: {v}")
-        logger.info(f"[COMPUTE CHECKLIST MISMATCH PERCENT] {k}: {len(v)}")
 
 
-def get_requirement_kind_v2(requirement: DataRequirement) -> str:
-    if requirement.WhichOneof("requirement") == "any_of":
-        if requirement.name == "Citizenship and Documentation":
-            return "citizenship_and_documentation"
-        elif (
-            requirement.any_of.requirements[0].provider_requirement.WhichOneof(
-                "requirement"
-            )
-            == "military_history"
-        ):
-            return "military_history_assignment"
-        elif (
-            requirement.any_of.requirements[0].provider_requirement.WhichOneof(
-                "requirement"
-            )
-            == "us_graduated"
-        ):
-            return "md_us_graduated_or_foreign_certificate"
-        elif (
-            requirement.any_of.requirements[0].provider_requirement.WhichOneof(
-                "requirement"
-            )
-            == "license"
-        ):
-            return "license"
-        elif (
-            requirement.any_of.requirements[0].provider_requirement.WhichOneof(
-                "requirement"
-            )
-            == "exam"
-        ):
-            return "exam"
-        elif (
-            requirement.any_of.requirements[0].provider_requirement.WhichOneof(
-                "requirement"
-            )
-            == "liability_insurance"
-        ):
-            return "group liability_insurance"
-        else:
-            return f"document {requirement.any_of.requirements[0].provider_requirement.document.constraints.matching_kind}"
-    else:
-        if requirement.WhichOneof("requirement") == "provider_requirement":
-            kind = requirement.provider_requirement.WhichOneof("requirement")
-            if kind == "standalone_review":
-                name = requirement.name
-                if name == "Review Provider Name Matches":
-                    return "standalone_provider_name"
-                elif name == "Verify Current Employer Using Medallion":
-                    return "standalone_current_employer"
-                else:
-                    return "standalone_board_certification"
-            elif kind == "medical_program":
-                return f"medical_program {requirement.name}"
-            elif kind == "document":
-                return f"document {requirement.provider_requirement.document.constraints.matching_kind}"
-            elif kind == "practice_start_date":
-                return f"practice {requirement.provider_requirement.practice_start_date.constraints.matching_practice_id.value} practice_start_date"
-            return kind
-        elif requirement.WhichOneof("requirement") == "practice_requirement":
-            requirement_kind = requirement.practice_requirement.WhichOneof(
-                "requirement"
-            )
-            return (
-                f"practice {requirement.principal.practice_id.value} {requirement_kind}"
-            )
-        else:
-            requirement_kind = requirement.group_requirement.WhichOneof("requirement")
-            return f"group {requirement_kind}"
+def run_incremental_mismatch_analysis(
+    analyzer_names, prefix, state_store, full_rebuild=False
+):
+    """Re-check only checklists that changed since the stored watermark.
 
+    Entries of unchanged checklists are reused from ``state_store`` (see
+    get_mismatch_state) and checklists that left the pe-intake set are
+    dropped. Without a usable state (first run, other analyzers,
+    ``full_rebuild``) every checklist is checked and the state is rebuilt.
+    """
+    from django.utils import timezone
 
-def get_requirement_kind_v1(requirement: ProviderDataRequirement) -> str:
-    if requirement.WhichOneof("requirement") == "any_of":
-        if requirement.name == "Us Citizen":
-            return "citizenship_and_documentation"
-        elif (
-            requirement.any_of.requirements[0].WhichOneof("requirement")
-            == "military_history"
-        ):
-            return "military_history_assignment"
-        elif (
-            requirement.any_of.requirements[0].WhichOneof("requirement")
-            == "us_graduated"
-        ):
-            return "md_us_graduated_or_foreign_certificate"
-        elif requirement.any_of.requirements[0].WhichOneof("requirement") == "license":
-            return "license"
-        elif requirement.any_of.requirements[0].WhichOneof("requirement") == "exam":
-            return "exam"
-        else:
-            return f"document {requirement.any_of.requirements[0].document.constraints.matching_kind}"
-    elif requirement.WhichOneof("requirement") == "standalone_verification":
-        name = requirement.name
-        if name == "Verify Provider Name Matches":
-            return "standalone_provider_name"
-        elif name == "Verify Current Employer Using Medallion":
-            return "standalone_current_employer"
-        else:
-            return "standalone_board_certification"
-    elif requirement.WhichOneof("requirement") == "medical_program":
-        return f"medical_program {requirement.name}"
-    elif requirement.WhichOneof("requirement") == "document":
-        return f"document {requirement.document.constraints.matching_kind}"
-    elif requirement.WhichOneof("requirement") == "related_practice_requirement":
-        requirement_kind = requirement.related_practice_requirement.WhichOneof(
-            "requirement"
+    analyzer_names = sorted(analyzer_names)
+    checklists = get_pe_intake_checklists()
+    state = None if full_rebuild else state_store.load()
+    if full_rebuild:
+        logger.info(f"{prefix} Full rebuild requested")
+    elif state is None:
+        logger.warning(f"{prefix} No stored state in {state_store}, rebuilding")
+    elif state["analyzers"] != analyzer_names:
+        logger.info(f"{prefix} Analyzers changed, rebuilding")
+        state = None
+
+    # Taken before reading anything, so changes made during the run are
+    # picked up again by the next one
+    watermark = timezone.now()
+    current_ids = {str(cl_id) for cl_id in checklists.values_list("id", flat=True)}
+    if state is None:
+        entries = {}
+        changed = checklists
+    else:
+        entries = {k: v for k, v in state["entries"].items() if k in current_ids}
+        since = datetime.fromisoformat(state["watermark"])
+        changed = get_changed_checklists(
+            checklists, since, current_ids - entries.keys()
         )
-        if requirement_kind == "start_date":
-            requirement_kind = "practice_start_date"
-        return f"practice {requirement.related_practice_requirement.relation_constraints.practice_id.value} {requirement_kind}"
-    elif requirement.WhichOneof("requirement") == "related_group_requirement":
-        requirement_kind = requirement.related_group_requirement.WhichOneof(
-            "requirement"
+
+    rechecked = collect_mismatch_entries(analyzer_names, changed, prefix)
+    entries.update(rechecked)
+    state_store.save(
+        {
+            "watermark": watermark.isoformat(),
+            "analyzers": analyzer_names,
+            "entries": entries,
+        },
+    )
+    analysis = summarize_mismatch_entries(analyzer_names, entries)
+    analysis["rechecked"] = len(rechecked)
+    return analysis
+
+
+# ntile() deals the id-ordered rows into equal tiles; the first id of each
+# tile after the first is a shard's lower bound. One sort of the ids instead
+# of one OFFSET scan per shard. DISTINCT ON rather than min(), which has no
+# uuid implementation.
+SHARD_BOUNDS_SQL = """
+SELECT DISTINCT ON (tiles.tile) tiles.id
+FROM (
+    SELECT c.{id} AS id, ntile(%s) OVER (ORDER BY c.{id}) AS tile
+    FROM ({checklists}) c
+) tiles
+WHERE tiles.tile > 1
+ORDER BY tiles.tile, tiles.id
+"""
+
+
+def get_checklist_shard_bounds(checklists, shard_count):
+    """Split the checklist id space into ``shard_count`` contiguous ranges.
+
+    Bounds are taken from equal-sized tiles of the id-ordered queryset in a
+    single query, so each shard covers roughly the same number of rows for
+    integer and uuid ids alike. Returns (lower, upper) pairs as strings, with
+    None for an open end.
+    """
+    from django.db import connection
+
+    checklists_sql, params = checklists.values("id").query.sql_with_params()
+    query = SHARD_BOUNDS_SQL.format(
+        id=connection.ops.quote_name(checklists.model._meta.get_field("id").column),
+        checklists=checklists_sql,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(query, (shard_count, *params))
+        bounds = [None] + [str(bound) for (bound,) in cursor.fetchall()]
+    bounds.append(None)
+    return list(zip(bounds, bounds[1:]))
+
+
+@shared_task()
+@profiled
+def task_compute_checklist_mismatch():
+    prefix = "[COMPUTE CHECKLIST MISMATCH]"
+    logger.info(f"{prefix} Starting")
+    analysis = run_mismatch_analysis([MatchAnalyzer.name], prefix)
+    log_mismatch_results(analysis["results"], prefix)
+
+
+@shared_task()
+@profiled
+def task_compute_checklist_mismatch_avoid_has_mismatching_related_object():
+    prefix = "[COMPUTE CHECKLIST MISMATCH FILTER]"
+    logger.info("[COMPUTE CHECKLIST MISMATCH] Starting related object check")
+    analysis = run_mismatch_analysis([FilteredMatchAnalyzer.name], prefix)
+    log_mismatch_results(analysis["results"], prefix)
+
+
+@shared_task()
+@profiled
+def task_compute_checklist_mismatch_percent():
+    prefix = "[COMPUTE CHECKLIST MISMATCH PERCENT]"
+    logger.info(f"{prefix} Starting")
+    analysis = run_mismatch_analysis([PercentDiffAnalyzer.name], prefix)
+    log_mismatch_results(analysis["results"], prefix)
+
+
+# Requirement kinds that only depend on the oneof case of the first any_of
+# alternative. Anything else in an any_of is a document alternative.
+ANY_OF_KINDS_V2 = {
+    "military_history": "military_history_assignment",
+    "us_graduated": "md_us_graduated_or_foreign_certificate",
+    "license": "license",
+    "exam": "exam",
+    "liability_insurance": "group liability_insurance",
+}
+ANY_OF_KINDS_V1 = {
+    "military_history": "military_history_assignment",
+    "us_graduated": "md_us_graduated_or_foreign_certificate",
+    "license": "license",
+    "exam": "exam",
+}
+STANDALONE_KINDS_V2 = {
+    "Review Provider Name Matches": "standalone_provider_name",
+    "Verify Current Employer Using Medallion": "standalone_current_employer",
+}
+STANDALONE_KINDS_V1 = {
+    "Verify Provider Name Matches": "standalone_provider_name",
+    "Verify Current Employer Using Medallion": "standalone_current_employer",
+}
+
+# Memoizing needs the oneof payload serialized as a cache key, which costs
+# about as much as the table lookup it saves unless the payloads are cheap to
+# serialize; benchmark_requirement_kind.py measures both. 0 disables it.
+REQUIREMENT_KIND_CACHE_SIZE = 0
+_requirement_kind_cache_v1 = {}
+_requirement_kind_cache_v2 = {}
+
+
+def _any_of_kind_v2(requirement: DataRequirement) -> str:
+    if requirement.name == "Citizenship and Documentation":
+        return "citizenship_and_documentation"
+    alternative = requirement.any_of.requirements[0].provider_requirement
+    kind = ANY_OF_KINDS_V2.get(alternative.WhichOneof("requirement"))
+    if kind is not None:
+        return kind
+    return f"document {alternative.document.constraints.matching_kind}"
+
+
+def _provider_requirement_kind_v2(requirement: DataRequirement) -> str:
+    provider_requirement = requirement.provider_requirement
+    kind = provider_requirement.WhichOneof("requirement")
+    if kind == "standalone_review":
+        return STANDALONE_KINDS_V2.get(
+            requirement.name, "standalone_board_certification"
         )
-        return f"group {requirement_kind}"
-    else:
-        return requirement.WhichOneof("requirement")
+    elif kind == "medical_program":
+        return f"medical_program {requirement.name}"
+    elif kind == "document":
+        return f"document {provider_requirement.document.constraints.matching_kind}"
+    elif kind == "practice_start_date":
+        return f"practice {provider_requirement.practice_start_date.constraints.matching_practice_id.value} practice_start_date"
+    return kind
+
+
+def _practice_requirement_kind_v2(requirement: DataRequirement) -> str:
+    requirement_kind = requirement.practice_requirement.WhichOneof("requirement")
+    return f"practice {requirement.principal.practice_id.value} {requirement_kind}"
+
+
+def _group_requirement_kind_v2(requirement: DataRequirement) -> str:
+    requirement_kind = requirement.group_requirement.WhichOneof("requirement")
+    return f"group {requirement_kind}"
+
+
+REQUIREMENT_KIND_CLASSIFIERS_V2 = {
+    "any_of": _any_of_kind_v2,
+    "provider_requirement": _provider_requirement_kind_v2,
+    "practice_requirement": _practice_requirement_kind_v2,
+}
+
+
+def _any_of_kind_v1(requirement: ProviderDataRequirement) -> str:
+    if requirement.name == "Us Citizen":
+        return "citizenship_and_documentation"
+    alternative = requirement.any_of.requirements[0]
+    kind = ANY_OF_KINDS_V1.get(alternative.WhichOneof("requirement"))
+    if kind is not None:
+        return kind
+    return f"document {alternative.document.constraints.matching_kind}"
+
+
+def _standalone_verification_kind_v1(requirement: ProviderDataRequirement) -> str:
+    return STANDALONE_KINDS_V1.get(requirement.name, "standalone_board_certification")
+
+
+def _medical_program_kind_v1(requirement: ProviderDataRequirement) -> str:
+    return f"medical_program {requirement.name}"
+
+
+def _document_kind_v1(requirement: ProviderDataRequirement) -> str:
+    return f"document {requirement.document.constraints.matching_kind}"
+
+
+def _related_practice_requirement_kind_v1(
+    requirement: ProviderDataRequirement,
+) -> str:
+    related = requirement.related_practice_requirement
+    requirement_kind = related.WhichOneof("requirement")
+    if requirement_kind == "start_date":
+        requirement_kind = "practice_start_date"
+    return (
+        f"practice {related.relation_constraints.practice_id.value} {requirement_kind}"
+    )
+
+
+def _related_group_requirement_kind_v1(requirement: ProviderDataRequirement) -> str:
+    requirement_kind = requirement.related_group_requirement.WhichOneof("requirement")
+    return f"group {requirement_kind}"
+
+
+REQUIREMENT_KIND_CLASSIFIERS_V1 = {
+    "any_of": _any_of_kind_v1,
+    "standalone_verification": _standalone_verification_kind_v1,
+    "medical_program": _medical_program_kind_v1,
+    "document": _document_kind_v1,
+    "related_practice_requirement": _related_practice_requirement_kind_v1,
+    "related_group_requirement": _related_group_requirement_kind_v1,
+}
+
+
+def _classify_cached(cache, key, classify, requirement) -> str:
+    kind = cache.get(key)
+    if kind is None:
+        kind = classify(requirement)
+        if len(cache) >= REQUIREMENT_KIND_CACHE_SIZE:
+            cache.clear()
+        cache[key] = kind
+    return kind
+
+
+def get_requirement_kind_v2(requirement: DataRequirement) -> str:
+    case = requirement.WhichOneof("requirement")
+    classify = REQUIREMENT_KIND_CLASSIFIERS_V2.get(case, _group_requirement_kind_v2)
+    if not REQUIREMENT_KIND_CACHE_SIZE:
+        return classify(requirement)
+    # The kind only depends on the name, the oneof payload and, for practice
+    # requirements, the principal; processing_status is left out so the same
+    # template requirement hits the cache on every checklist.
+    key = (
+        case,
+        requirement.name,
+        (
+            getattr(requirement, case).SerializeToString(deterministic=True)
+            if case
+            else b""
+        ),
+        (
+            requirement.principal.SerializeToString(deterministic=True)
+            if case == "practice_requirement"
+            else b""
+        ),
+    )
+    return _classify_cached(_requirement_kind_cache_v2, key, classify, requirement)
+
+
+def get_requirement_kind_v1(requirement: ProviderDataRequirement) -> str:
+    case = requirement.WhichOneof("requirement")
+    classify = REQUIREMENT_KIND_CLASSIFIERS_V1.get(case)
+    if classify is None:
+        return case
+    if not REQUIREMENT_KIND_CACHE_SIZE:
+        return classify(requirement)
+    key = (
+        case,
+        requirement.name,
+        getattr(requirement, case).SerializeToString(deterministic=True),
+    )
+    return _classify_cached(_requirement_kind_cache_v1, key, classify, requirement)
 
 
 def requirement_statuses_equal(
@@ -268,83 +827,490 @@ def requirement_statuses_equal(
     return req_v1.processing_status == req_v2.processing_status
 
 
+class RequirementAlignment(NamedTuple):
+    # One entry per v2 requirement, in report order.
+    matched: List[str]
+    mismatched: List[str]
+    # Kinds present on one side only.
+    only_v1: Set[str]
+    only_v2: Set[str]
+
+
+def align_requirements(
+    requirements_v1: Iterable[ProviderDataRequirement],
+    requirements_v2: Iterable[DataRequirement],
+    kind_v1=get_requirement_kind_v1,
+    kind_v2=get_requirement_kind_v2,
+) -> RequirementAlignment:
+    """Join v1 and v2 requirements on their requirement kind.
+
+    Each requirement is classified once and the v1 side is indexed by kind,
+    so the join is linear in the number of requirements. A v2 requirement is
+    mismatched when any v1 requirement of the same kind has a different
+    status. ``kind_v1``/``kind_v2`` read the kind of an already classified
+    requirement, such as the entries of a stored report summary.
+    """
+    v1_by_kind = defaultdict(list)
+    for req_v1 in requirements_v1:
+        v1_by_kind[kind_v1(req_v1)].append(req_v1)
+
+    matched, mismatched, v2_kinds = [], [], set()
+    for req_v2 in requirements_v2:
+        kind = kind_v2(req_v2)
+        v2_kinds.add(kind)
+        reqs_v1 = v1_by_kind.get(kind)
+        if not reqs_v1:
+            continue
+        if all(requirement_statuses_equal(req_v1, req_v2) for req_v1 in reqs_v1):
+            matched.append(kind)
+        else:
+            mismatched.append(kind)
+    return RequirementAlignment(
+        matched=matched,
+        mismatched=mismatched,
+        only_v1=v1_by_kind.keys() - v2_kinds,
+        only_v2=v2_kinds - v1_by_kind.keys(),
+    )
+
+
 @shared_task()
+@profiled
 def task_compute_checklist_mismatch_requirement_kind():
-    from collections import defaultdict
+    prefix = "[COMPUTE CHECKLIST MISMATCH REQUIREMENT KIND]"
+    analysis = run_mismatch_analysis([RequirementKindAnalyzer.name], prefix)
+    log_mismatch_results(analysis["results"], prefix)
+
+
+@shared_task()
+@profiled
+def task_compute_checklist_mismatch_all(analyzers=None):
+    """Compute every mismatch breakdown in a single pass over the checklists.
+
+    ``analyzers`` is an optional list of names from MISMATCH_ANALYZERS; all of
+    them run by default. The combined result is returned as well as logged.
+    """
+    prefix = "[COMPUTE CHECKLIST MISMATCH ALL]"
+    logger.info(f"{prefix} Starting")
+    analysis = run_mismatch_analysis(analyzers or list(MISMATCH_ANALYZERS), prefix)
+    log_mismatch_results(analysis["results"], prefix)
+    return analysis
+
+
+@shared_task()
+@profiled
+def task_compute_checklist_mismatch_incremental(analyzers=None, full_rebuild=False):
+    """Incremental version of task_compute_checklist_mismatch_all.
+
+    Per-checklist results and a watermark are kept where get_mismatch_state
+    says, which every worker can read; only checklists whose reports changed
+    since the previous run are re-checked. ``full_rebuild`` ignores the
+    stored state and re-checks everything.
+    """
+    prefix = "[COMPUTE CHECKLIST MISMATCH INCREMENTAL]"
+    logger.info(f"{prefix} Starting")
+    analysis = run_incremental_mismatch_analysis(
+        analyzers or list(MISMATCH_ANALYZERS),
+        prefix,
+        get_mismatch_state(),
+        full_rebuild=full_rebuild,
+    )
+    logger.info(
+        f"{prefix} Re-checked {analysis['rechecked']} checklists, "
+        f"{analysis['processed']} tracked"
+    )
+    missing = analysis["missing"]
+    logger.info(f"{prefix} Missing provider checklist: {len(missing)} {missing}")
+    log_mismatch_results(analysis["results"], prefix)
+    return analysis
+
+
+MISMATCH_SHARD_COUNT = 88  # 22 prod workers at concurrency 4
+
+
+@shared_task()
+@profiled
+def task_compute_checklist_mismatch_shard(analyzers, lower=None, upper=None):
+    checklists = get_pe_intake_checklists()
+    if lower is not None:
+        checklists = checklists.filter(id__gte=lower)
+    if upper is not None:
+        checklists = checklists.filter(id__lt=upper)
+    prefix = f"[COMPUTE CHECKLIST MISMATCH SHARD {lower}-{upper}]"
+    return run_mismatch_analysis(analyzers, prefix, checklists=checklists)
+
+
+@shared_task()
+@profiled
+def task_merge_checklist_mismatch_shards(analyses):
+    prefix = "[COMPUTE CHECKLIST MISMATCH SHARDED]"
+    analysis = merge_mismatch_analyses(analyses)
+    missing = analysis["missing"]
+    logger.info(f"{prefix} Missing provider checklist: {len(missing)} {missing}")
+    log_mismatch_results(analysis["results"], prefix)
+    return analysis
 
+
+@shared_task()
+@profiled
+def task_compute_checklist_mismatch_sharded(
+    shard_count=MISMATCH_SHARD_COUNT, analyzers=None
+):
+    """Sharded version of task_compute_checklist_mismatch_all.
+
+    Each id range runs as its own task and returns partial aggregates, which a
+    chord callback merges into the same result the serial task produces.
+    """
+    analyzers = analyzers or list(MISMATCH_ANALYZERS)
+    shards = get_checklist_shard_bounds(get_pe_intake_checklists(), shard_count)
+    logger.info(f"[COMPUTE CHECKLIST MISMATCH SHARDED] Starting {len(shards)} shards")
+    chord(
+        task_compute_checklist_mismatch_shard.s(analyzers, lower, upper)
+        for lower, upper in shards
+    )(task_merge_checklist_mismatch_shards.s())
+
+
+# Denormalized report summaries. Checklist and ProviderChecklist keep a JSON
+# copy of what the mismatch analyzers read from latest_report:
+#   {"version": 2, "modified": "2025-01-01T00:00:00+00:00",
+#    "percent_complete": 87, "requirements": [[kind, status], ...]}
+# with one [requirement kind, processing_status] pair per processed
+# requirement, in report order. "modified" is the row's modified timestamp
+# when its report was summarized; a newer report bumps it, which makes the
+# summary outdated. Bump the version when the kind classifiers change, so the
+# backfill rewrites every summary.
+REPORT_SUMMARY_FIELD = "report_summary"
+REPORT_SUMMARY_VERSION = 2
+REPORT_SUMMARY_FETCH_SIZE = 2000
+
+SUMMARY_JOIN_SQL = """
+SELECT c.{id}, c.{percent_complete}, c.{summary}, c.{modified},
+       p.{pc_id}, p.{pc_summary}, p.{pc_modified}
+FROM {checklist} c
+LEFT JOIN LATERAL (
+    SELECT {pc_id}, {pc_summary}, {pc_modified}
+    FROM {provider_checklist}
+    WHERE {pc_unique_key} = c.{unique_key}
+    ORDER BY {pc_id} DESC
+    LIMIT 1
+) p ON true
+WHERE c.{id} IN ({checklists})
+ORDER BY c.{id}
+"""
+
+
+class SummarizedRequirement(NamedTuple):
+    kind: str
+    processing_status: int
+
+
+class ReportSummary(NamedTuple):
+    percent_complete: int
+    processed_requirements: List[SummarizedRequirement]
+
+
+class SummarizedObject(NamedTuple):
+    """Stands in for a Checklist/ProviderChecklist row in the analyzers."""
+
+    id: object
+    percent_complete: int
+    report: ReportSummary
+
+
+class SummaryReports:
+    """Report source for the analyzers backed by stored summaries.
+
+    Summarized requirements are already classified, so their kind is read
+    as it was stored.
+    """
+
+    def get(self, obj):
+        return obj.report
+
+    def requirement_kind_v1(self, requirement):
+        return requirement.kind
+
+    def requirement_kind_v2(self, requirement):
+        return requirement.kind
+
+
+def summarize_report(report, classify, modified):
+    return {
+        "version": REPORT_SUMMARY_VERSION,
+        "modified": modified.isoformat(),
+        "percent_complete": report.percent_complete,
+        "requirements": [
+            [classify(requirement), requirement.processing_status]
+            for requirement in report.processed_requirements
+        ],
+    }
+
+
+def summarize_object(obj, report=None):
+    """Summary of a Checklist (v2 report) or ProviderChecklist (v1 report)."""
+    if report is None:
+        report = obj.primitive().latest_report
+    modified = getattr(obj, MISMATCH_WATERMARK_FIELD)
+    if obj._meta.model_name == "providerchecklist":
+        return summarize_report(report, get_requirement_kind_v1, modified)
+    return summarize_report(report, get_requirement_kind_v2, modified)
+
+
+def store_report_summary(obj, report=None):
+    """Write the summary of ``obj``'s latest report next to it.
+
+    Call this wherever a Checklist or ProviderChecklist report is produced,
+    after the report is saved, passing the freshly built report to skip
+    decoding it again. Until then the row's summary reads as outdated.
+    """
+    setattr(obj, REPORT_SUMMARY_FIELD, summarize_object(obj, report))
+    obj.save(update_fields=[REPORT_SUMMARY_FIELD])
+
+
+def load_report_summary(data, modified):
+    """ReportSummary from a stored summary, None if missing or outdated.
+
+    ``modified`` is the row's current modified timestamp; a summary taken
+    at any other one describes an older report.
+    """
+    if isinstance(data, str):
+        data = json.loads(data)
+    if not data or data.get("version") != REPORT_SUMMARY_VERSION:
+        return None
+    if modified is None or datetime.fromisoformat(data["modified"]) != modified:
+        return None
+    return ReportSummary(
+        data["percent_complete"],
+        [SummarizedRequirement(kind, status) for kind, status in data["requirements"]],
+    )
+
+
+def iter_summary_rows(checklists):
+    """Stream the checklists' summary rows.
+
+    Each row is (checklist id, percent_complete, v2 summary, modified, pc id,
+    v1 summary, pc modified).
+
+    One query joins the checklists to their ProviderChecklist on unique_key,
+    taking the one with the highest id like iter_checklist_pairs, so each
+    checklist is counted once; pc id is None for checklists without one.
+    """
+    from apps.providers.models import ProviderChecklist
+    from django.db import connection
+
+    quote = connection.ops.quote_name
+
+    def column(model, name):
+        return quote(model._meta.get_field(name).column)
+
+    Checklist = checklists.model
+    checklists_sql, params = checklists.values("id").query.sql_with_params()
+    query = SUMMARY_JOIN_SQL.format(
+        id=column(Checklist, "id"),
+        percent_complete=column(Checklist, "percent_complete"),
+        summary=column(Checklist, REPORT_SUMMARY_FIELD),
+        unique_key=column(Checklist, "unique_key"),
+        modified=column(Checklist, MISMATCH_WATERMARK_FIELD),
+        pc_id=column(ProviderChecklist, "id"),
+        pc_summary=column(ProviderChecklist, REPORT_SUMMARY_FIELD),
+        pc_modified=column(ProviderChecklist, MISMATCH_WATERMARK_FIELD),
+        pc_unique_key=column(ProviderChecklist, "unique_key"),
+        checklist=quote(Checklist._meta.db_table),
+        provider_checklist=quote(ProviderChecklist._meta.db_table),
+        checklists=checklists_sql,
+    )
+    # A server-side cursor, so the rows are not all held in memory at once
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(REPORT_SUMMARY_FETCH_SIZE)
+            if not rows:
+                return
+            yield from rows
+
+
+def run_summary_mismatch_analysis(analyzer_names, prefix, checklists=None):
+    """run_mismatch_analysis over stored report summaries.
+
+    No report is decoded. Checklists whose own or ProviderChecklist summary
+    is missing or outdated (older than the row's report, or in an older
+    format) are listed under ``unsummarized`` instead of being analyzed;
+    task_backfill_report_summaries rewrites them.
+    """
+    from onboarding_analysis.progress import PhaseTimer, ProgressReporter
+
+    if checklists is None:
+        checklists = get_pe_intake_checklists()
+    analyzers = [MISMATCH_ANALYZERS[name]() for name in analyzer_names]
+    timer = PhaseTimer()
+    progress = ProgressReporter(logger, prefix)
+    reports = SummaryReports()
+    missing, unsummarized = [], []
+    rows = iter_summary_rows(checklists)
+    while True:
+        with timer.phase("db_fetch"):
+            row = next(rows, None)
+        if row is None:
+            break
+        (
+            cl_id,
+            percent_complete,
+            summary_v2,
+            modified,
+            pc_id,
+            summary_v1,
+            pc_modified,
+        ) = row
+        if pc_id is None:
+            missing.append(cl_id)
+            continue
+        with timer.phase("load_summary"):
+            report_v2 = load_report_summary(summary_v2, modified)
+            report_v1 = load_report_summary(summary_v1, pc_modified)
+        if report_v1 is None or report_v2 is None:
+            unsummarized.append(cl_id)
+            continue
+        cl = SummarizedObject(cl_id, percent_complete, report_v2)
+        provider_checklist = SummarizedObject(
+            pc_id, report_v1.percent_complete, report_v1
+        )
+        for analyzer in analyzers:
+            with timer.phase(analyzer.name):
+                analyzer.observe(cl, provider_checklist, reports)
+        progress.advance()
+    progress.finish()
+    logger.info(f"{prefix} Missing provider checklist: {len(missing)} {missing}")
+    logger.info(f"{prefix} Unsummarized: {len(unsummarized)} {unsummarized}")
+    timer.emit(logger, prefix, MISMATCH_PHASE_METRIC)
+    return {
+        "processed": progress.count,
+        "missing": missing,
+        "unsummarized": unsummarized,
+        "results": {analyzer.name: analyzer.result() for analyzer in analyzers},
+    }
+
+
+@shared_task()
+@profiled
+def task_compute_checklist_mismatch_from_summaries(analyzers=None):
+    """task_compute_checklist_mismatch_all over the stored report summaries."""
+    prefix = "[COMPUTE CHECKLIST MISMATCH SUMMARIES]"
+    logger.info(f"{prefix} Starting")
+    analysis = run_summary_mismatch_analysis(
+        analyzers or list(MISMATCH_ANALYZERS), prefix
+    )
+    log_mismatch_results(analysis["results"], prefix)
+    return analysis
+
+
+@shared_task()
+@profiled
+def task_backfill_report_summaries(batch_size=500):
+    """Write missing or outdated report summaries of pe-intake checklists.
+
+    A summary is outdated when its format version is old or it was taken at
+    another modified timestamp than the row's, i.e. from an older report.
+    """
     from apps.checklists.models import Checklist
-    from apps.core.helpers import chunked_raw_queryset
     from apps.providers.models import ProviderChecklist
+    from django.db.models import DateTimeField, F, Q
+    from django.db.models.fields.json import KeyTextTransform
+    from django.db.models.functions import Cast
+    from onboarding_analysis.progress import ProgressReporter
 
-    checklists = Checklist.objects.prefetch_related(
-        "providers__user__org_memberships"
-    ).filter(
-        unique_key__startswith="pe-intake-",
-        deleted__isnull=True,
-        providers__user__org_memberships__is_active=True,
+    prefix = "[BACKFILL REPORT SUMMARIES]"
+    stale = (
+        Q(**{f"{REPORT_SUMMARY_FIELD}__isnull": True})
+        | ~Q(**{f"{REPORT_SUMMARY_FIELD}__version": REPORT_SUMMARY_VERSION})
+        | Q(summarized_at__isnull=True)
+        | ~Q(summarized_at=F(MISMATCH_WATERMARK_FIELD))
     )
-    processed, total = 1, checklists.count()
-    map = defaultdict(list)
-    for chunk in chunked_raw_queryset(checklists, 500):
-        for cl in chunk:
-            logger.info(
-                f"[COMPUTE CHECKLIST MISMATCH REQUIREMENT KIND] Processing checklist {cl.id}: {processed}/{total}"
+    for model in (Checklist, ProviderChecklist):
+        queryset = model.objects.annotate(
+            summarized_at=Cast(
+                KeyTextTransform("modified", REPORT_SUMMARY_FIELD), DateTimeField()
             )
-            provider_checklist = ProviderChecklist.objects.get(unique_key=cl.unique_key)
-            processed_requirements_v1 = (
-                provider_checklist.primitive().latest_report.processed_requirements
-            )
-            if any(req.processing_status == 5 for req in processed_requirements_v1):
-                continue
-            processed_requirements_v2 = (
-                cl.primitive().latest_report.processed_requirements
-            )
-            if (
-                cl.percent_complete
-                != provider_checklist.primitive().latest_report.percent_complete
-            ):
-                for req_v2 in processed_requirements_v2:
-                    req_v2_kind = get_requirement_kind_v2(req_v2)
-                    for req_v1 in processed_requirements_v1:
-                        if req_v2_kind == get_requirement_kind_v1(
-                            req_v1
-                        ) and not requirement_statuses_equal(req_v1, req_v2):
-                            map[req_v2_kind].append(cl.id)
-                            break
-            processed += 1
-    for k, v in map.items():
-        logger.info(f"[COMPUTE CHECKLIST MISMATCH REQUIREMENT KIND] {k}: {v}")
-        logger.info(f"[COMPUTE CHECKLIST MISMATCH REQUIREMENT KIND] {k}: {len(v)}")
+        ).filter(stale, unique_key__startswith="pe-intake-")
+        progress = ProgressReporter(
+            logger, f"{prefix} {model.__name__}", total=queryset.count()
+        )
+        for chunk in keyset_chunked_queryset(queryset, batch_size):
+            for obj in chunk:
+                try:
+                    setattr(obj, REPORT_SUMMARY_FIELD, summarize_object(obj))
+                except Exception:
+                    logger.error(f"{prefix} {model.__name__} {obj.pk} failed")
+            model.objects.bulk_update(chunk, [REPORT_SUMMARY_FIELD])
+            progress.advance(len(chunk))
+        progress.finish()
 
 
-@shared_task()
-def task_get_single_provider_onboarding_aggregate_data(provider_id):
-    import json
+def record_provider_onboarding_aggregate_data(provider, sink=None):
+    percent_complete = provider.get_percent_complete()
+    missing_sections = provider.get_missing_sections()
+    if sink is not None:
+        sink.write(provider.id, percent_complete, missing_sections)
+        return
+    info = {
+        "percent_complete": percent_complete,
+        "missing_sections": missing_sections,
+    }
+    logger.info(
+        f"[ONBOARDING-AGGREGATE] Provider data {provider.id}: {json.dumps(info)}\n"
+    )
 
+
+@shared_task()
+@profiled
+def task_get_single_provider_onboarding_aggregate_data(provider_id, run_label=None):
     from apps.providers.models import Provider
+    from onboarding_analysis.results import get_result_sink
 
+    sink = get_result_sink(run_label)
     try:
         provider = Provider.objects.get(id=provider_id)
-        percent_complete = provider.get_percent_complete()
-        missing_sections = provider.get_missing_sections()
-        info = {
-            "percent_complete": percent_complete,
-            "missing_sections": missing_sections,
-        }
-        logger.info(
-            f"[ONBOARDING-AGGREGATE] Provider data {provider.id}: {json.dumps(info)}\n"
-        )
+        record_provider_onboarding_aggregate_data(provider, sink)
     except Exception:
         logger.error(f"[ONBOARDING-AGGREGATE] Provider {provider_id} failed")
+    finally:
+        if sink is not None:
+            sink.close()
 
 
 @shared_task()
-def task_get_provider_onboarding_aggregate_data():
-    from apps.checklists.models import Checklist
-    from apps.core.helpers import chunked_queryset
+@profiled
+def task_get_batch_provider_onboarding_aggregate_data(provider_ids, run_label=None):
     from apps.providers.models import Provider
+    from onboarding_analysis.results import get_result_sink
+
+    sink = get_result_sink(run_label)
+    providers = Provider.objects.filter(id__in=provider_ids)
+    found = set()
+    try:
+        for provider in providers:
+            found.add(str(provider.id))
+            try:
+                record_provider_onboarding_aggregate_data(provider, sink)
+            except Exception:
+                logger.error(f"[ONBOARDING-AGGREGATE] Provider {provider.id} failed")
+    finally:
+        if sink is not None:
+            sink.close()
+    for provider_id in set(map(str, provider_ids)) - found:
+        logger.error(f"[ONBOARDING-AGGREGATE] Provider {provider_id} failed")
+
+
+@shared_task()
+@profiled
+def task_get_provider_onboarding_aggregate_data(batch_size=300, run_label=None):
+    """Fan out onboarding aggregate computation in batches of provider ids.
 
-    CHUNK_SIZE = 300
+    With a ``run_label`` and ONBOARDING_AGGREGATE_RESULTS_DIR set on the
+    workers, results are written to onboarding_analysis.results instead of
+    the log.
+    """
+    from apps.checklists.models import Checklist
+    from apps.providers.models import Provider
+    from onboarding_analysis.progress import PhaseTimer, ProgressReporter
 
     provider_ids = (
         Checklist.objects.prefetch_related("providers__user__org_memberships")
@@ -355,12 +1321,24 @@ def task_get_provider_onboarding_aggregate_data():
         .values_list("providers__id", flat=True)
         .distinct()
     )
-    providers = Provider.objects.filter(id__in=provider_ids)
-    total = providers.count()
-    current = 0
-
-    for chunk in chunked_queryset(providers, CHUNK_SIZE):
-        for provider in chunk:
-            current += 1
-            task_get_single_provider_onboarding_aggregate_data.delay(provider.id)
-            logger.info(f"[ONBOARDING-AGGREGATE] Progress: {current} / {total}")
+    ids = Provider.objects.filter(id__in=provider_ids).values_list("id", flat=True)
+    timer = PhaseTimer()
+    with timer.phase("db_count"):
+        progress = ProgressReporter(logger, "[ONBOARDING-AGGREGATE]", total=ids.count())
+
+    batch = []
+    for provider_id in ids.iterator(chunk_size=batch_size):
+        batch.append(str(provider_id))
+        if len(batch) == batch_size:
+            with timer.phase("enqueue"):
+                task_get_batch_provider_onboarding_aggregate_data.delay(
+                    batch, run_label
+                )
+            progress.advance(len(batch))
+            batch = []
+    if batch:
+        with timer.phase("enqueue"):
+            task_get_batch_provider_onboarding_aggregate_data.delay(batch, run_label)
+        progress.advance(len(batch))
+    progress.finish()
+    timer.emit(logger, "[ONBOARDING-AGGREGATE]", "onboarding_aggregate.fan_out")
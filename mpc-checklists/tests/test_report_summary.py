@@ -0,0 +1,81 @@
+"""Report summaries go stale once their row gets a newer report.
+
+Needs celery and the generated protobufs (libs.gen) importable, like
+tasks.py itself; skipped otherwise.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("celery")
+pytest.importorskip("libs.gen.completion_pb2")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import tasks  # noqa: E402
+
+SUMMARIZED_AT = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+REPORTED_AT = SUMMARIZED_AT + timedelta(minutes=5)
+
+
+def report(percent_complete):
+    return SimpleNamespace(
+        percent_complete=percent_complete,
+        processed_requirements=[SimpleNamespace(kind="work", processing_status=2)],
+    )
+
+
+def summary(percent_complete, modified=SUMMARIZED_AT):
+    return tasks.summarize_report(
+        report(percent_complete), lambda requirement: requirement.kind, modified
+    )
+
+
+def test_summary_round_trip():
+    loaded = tasks.load_report_summary(summary(80), SUMMARIZED_AT)
+    assert loaded == tasks.ReportSummary(80, [tasks.SummarizedRequirement("work", 2)])
+
+
+def test_summary_of_older_report_is_outdated():
+    assert tasks.load_report_summary(summary(80), REPORTED_AT) is None
+
+
+def test_summary_in_another_timezone_is_current():
+    local = SUMMARIZED_AT.astimezone(timezone(timedelta(hours=-5)))
+    assert tasks.load_report_summary(summary(80, local), SUMMARIZED_AT) is not None
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        None,
+        {},
+        # Written before summaries recorded the report's timestamp
+        {"version": 1, "percent_complete": 80, "requirements": []},
+    ],
+)
+def test_missing_or_old_format_summary_is_outdated(data):
+    assert tasks.load_report_summary(data, SUMMARIZED_AT) is None
+
+
+def test_changed_report_is_listed_as_unsummarized(monkeypatch):
+    rows = [
+        # Summaries taken at the rows' current timestamps
+        (1, 80, summary(80), SUMMARIZED_AT, 11, summary(80), SUMMARIZED_AT),
+        # The checklist got a new report after its summary was written
+        (2, 90, summary(80), REPORTED_AT, 12, summary(80), SUMMARIZED_AT),
+        # So did the ProviderChecklist
+        (3, 80, summary(80), SUMMARIZED_AT, 13, summary(80), REPORTED_AT),
+        (4, 80, summary(80), SUMMARIZED_AT, None, None, None),
+    ]
+    monkeypatch.setattr(tasks, "iter_summary_rows", lambda checklists: iter(rows))
+    analysis = tasks.run_summary_mismatch_analysis(
+        [tasks.MatchAnalyzer.name], "[TEST]", checklists=object()
+    )
+    assert analysis["processed"] == 1
+    assert analysis["unsummarized"] == [2, 3]
+    assert analysis["missing"] == [4]
+    assert analysis["results"]["match"] == {"match": 1, "mismatch": 0}
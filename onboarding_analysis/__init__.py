@@ -0,0 +1 @@
+"""Shared helpers for the onboarding aggregate tasks and offline analysis scripts."""
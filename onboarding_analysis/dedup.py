@@ -0,0 +1,183 @@
+"""Memory-bounded streaming deduplication of CSV rows on one key column.
+
+Only a 16-byte blake2b digest of each key is kept, not the key itself. While
+the digests fit in ``max_digests``, unique rows are yielded as they are read.
+Past that, the digests seen so far and the remaining rows are spilled to
+hash-partitioned temporary files, each partition is deduplicated on its own,
+and the survivors are merged back in their original order. Either way the
+output is the first occurrence of every key, in input order.
+"""
+
+import csv
+import heapq
+import os
+import tempfile
+from hashlib import blake2b
+
+DIGEST_SIZE = 16
+# A 16-byte bytes object plus its set slot costs roughly this much in CPython.
+BYTES_PER_DIGEST = 100
+DEFAULT_MEMORY_MB = 512
+DEFAULT_PARTITIONS = 64
+
+
+class DedupStats:
+    def __init__(self):
+        self.rows = 0
+        self.duplicates = 0
+        self.spilled = False
+
+    @property
+    def unique(self):
+        return self.rows - self.duplicates
+
+
+def max_digests_for(memory_mb):
+    return memory_mb * 1024 * 1024 // BYTES_PER_DIGEST
+
+
+def key_digest(key):
+    return blake2b(key.encode("utf-8"), digest_size=DIGEST_SIZE).digest()
+
+
+def _partition(digest, partitions):
+    return int.from_bytes(digest[:4], "big") % partitions
+
+
+def iter_unique_rows(
+    rows,
+    key_column,
+    max_digests=max_digests_for(DEFAULT_MEMORY_MB),
+    partitions=DEFAULT_PARTITIONS,
+    stats=None,
+):
+    """Yield the first row for every distinct ``row[key_column]``.
+
+    ``key_column`` must be a non-negative index (see resolve_column). Rows too
+    short to have the key column are passed through unchanged.
+    """
+    if key_column < 0:
+        raise ValueError(f"key_column must be non-negative, got {key_column}")
+    if stats is None:
+        stats = DedupStats()
+    rows = iter(rows)
+    seen = set()
+    for index, row in enumerate(rows):
+        stats.rows += 1
+        if len(row) <= key_column:
+            yield row
+            continue
+        digest = key_digest(row[key_column])
+        if digest in seen:
+            stats.duplicates += 1
+            continue
+        seen.add(digest)
+        yield row
+        if len(seen) >= max_digests:
+            stats.spilled = True
+            yield from _iter_unique_rows_spilled(
+                rows, key_column, seen, partitions, stats, index + 1
+            )
+            return
+
+
+def _iter_unique_rows_spilled(rows, key_column, seen, partitions, stats, start):
+    with tempfile.TemporaryDirectory(prefix="dedup-") as tmp:
+
+        def path(kind, partition):
+            return os.path.join(tmp, f"{kind}-{partition}")
+
+        seen_files = [open(path("seen", p), "wb") for p in range(partitions)]
+        for digest in seen:
+            seen_files[_partition(digest, partitions)].write(digest)
+        for f in seen_files:
+            f.close()
+        seen.clear()
+
+        row_files = [open(path("rows", p), "w", newline="") for p in range(partitions)]
+        row_writers = [csv.writer(f) for f in row_files]
+        for index, row in enumerate(rows, start):
+            stats.rows += 1
+            if len(row) <= key_column:
+                partition = 0
+            else:
+                partition = _partition(key_digest(row[key_column]), partitions)
+            row_writers[partition].writerow([index, *row])
+        for f in row_files:
+            f.close()
+
+        for p in range(partitions):
+            with open(path("seen", p), "rb") as f:
+                data = f.read()
+            partition_seen = {
+                data[i : i + DIGEST_SIZE] for i in range(0, len(data), DIGEST_SIZE)
+            }
+            with open(path("rows", p), newline="") as src, open(
+                path("unique", p), "w", newline=""
+            ) as dst:
+                writer = csv.writer(dst)
+                for indexed_row in csv.reader(src):
+                    if len(indexed_row) > key_column + 1:
+                        digest = key_digest(indexed_row[key_column + 1])
+                        if digest in partition_seen:
+                            stats.duplicates += 1
+                            continue
+                        partition_seen.add(digest)
+                    writer.writerow(indexed_row)
+            os.remove(path("rows", p))
+
+        unique_files = [open(path("unique", p), newline="") for p in range(partitions)]
+        try:
+            merged = heapq.merge(
+                *(csv.reader(f) for f in unique_files),
+                key=lambda indexed_row: int(indexed_row[0]),
+            )
+            for indexed_row in merged:
+                yield indexed_row[1:]
+        finally:
+            for f in unique_files:
+                f.close()
+
+
+def resolve_column(header, column):
+    """Resolve ``column`` (an index or a header name) to a non-negative index.
+
+    Negative indexes count from the end of the header, like list indexes.
+    """
+    if not isinstance(column, int):
+        if not column.lstrip("-").isdigit():
+            return header.index(column)
+        column = int(column)
+    if column >= 0:
+        return column
+    if column < -len(header):
+        raise ValueError(f"column {column} is out of range for {len(header)} columns")
+    return column + len(header)
+
+
+def dedup_csv(
+    input_path,
+    output_path,
+    key_column,
+    memory_mb=DEFAULT_MEMORY_MB,
+    partitions=DEFAULT_PARTITIONS,
+):
+    """Write the rows of ``input_path`` with a first-seen key to ``output_path``.
+
+    Returns the header, the resolved key column index and the DedupStats.
+    """
+    stats = DedupStats()
+    with open(input_path, "r", newline="") as src, open(
+        output_path, "w", newline=""
+    ) as dst:
+        reader = csv.reader(src)
+        writer = csv.writer(dst)
+        header = next(reader)
+        key_index = resolve_column(header, key_column)
+        writer.writerow(header)
+        writer.writerows(
+            iter_unique_rows(
+                reader, key_index, max_digests_for(memory_mb), partitions, stats
+            )
+        )
+    return header, key_index, stats
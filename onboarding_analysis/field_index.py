@@ -0,0 +1,70 @@
+"""Inverted index from missing ``(section, field)`` to provider IDs.
+
+Built once from a parsed export, persisted with map_cache next to the export,
+and then queried for a single field, a field prefix, or a set of fields
+without rescanning or re-parsing the export.
+"""
+
+from bisect import bisect_left
+from collections import Counter
+
+from .missing_sections import flatten_missing_sections
+
+
+class MissingFieldIndex:
+    def __init__(self, postings):
+        # (section, field) -> sorted provider IDs
+        self.postings = postings
+        self._keys = sorted(postings)
+
+    @classmethod
+    def build(cls, records):
+        """Index ``(provider_id, record)`` pairs; a provider is listed once per key."""
+        postings = {}
+        for provider_id, record in records:
+            for key in flatten_missing_sections(record.get("missing_sections")):
+                postings.setdefault(key, set()).add(provider_id)
+        return cls({key: sorted(ids) for key, ids in postings.items()})
+
+    def __getstate__(self):
+        return self.postings
+
+    def __setstate__(self, postings):
+        self.__init__(postings)
+
+    def counts(self):
+        return Counter({key: len(ids) for key, ids in self.postings.items()})
+
+    def sections(self):
+        return sorted({section for section, _ in self._keys})
+
+    def query(self, section, field):
+        """Providers missing ``field`` in ``section``."""
+        return list(self.postings.get((section, field), []))
+
+    def query_prefix(self, section, prefix):
+        """Map every field of ``section`` starting with ``prefix`` to its providers."""
+        matches = {}
+        for i in range(bisect_left(self._keys, (section, prefix)), len(self._keys)):
+            key_section, field = self._keys[i]
+            if key_section != section or not field.startswith(prefix):
+                break
+            matches[field] = list(self.postings[self._keys[i]])
+        return matches
+
+    def query_all(self, keys):
+        """Providers missing every one of the ``(section, field)`` keys."""
+        keys = list(keys)
+        if not keys:
+            return []
+        provider_ids = set(self.postings.get(keys[0], []))
+        for key in keys[1:]:
+            provider_ids.intersection_update(self.postings.get(key, []))
+        return sorted(provider_ids)
+
+    def query_any(self, keys):
+        """Providers missing at least one of the ``(section, field)`` keys."""
+        provider_ids = set()
+        for key in keys:
+            provider_ids.update(self.postings.get(key, []))
+        return sorted(provider_ids)
@@ -0,0 +1,70 @@
+"""Fixed-edge histograms for percent_complete values and differences.
+
+Bins are half-open ``[edges[i], edges[i + 1])``. Values outside
+``[edges[0], edges[-1])`` fall in no bin and are counted as out of range.
+Bulk counting uses NumPy when it is installed and bisect otherwise.
+"""
+
+from bisect import bisect_right
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+
+class Histogram:
+    def __init__(self, edges, labels=None):
+        edges = list(edges)
+        if len(edges) < 2 or any(a >= b for a, b in zip(edges, edges[1:])):
+            raise ValueError("edges must be strictly increasing with at least 2 values")
+        if labels is None:
+            labels = [f"{a}-{b}" for a, b in zip(edges, edges[1:])]
+        if len(labels) != len(edges) - 1:
+            raise ValueError("need one label per bin")
+        self.edges = edges
+        self.labels = list(labels)
+
+    def bucket(self, value):
+        """Return the bin index for ``value``, or None if it is out of range."""
+        i = bisect_right(self.edges, value) - 1
+        if 0 <= i < len(self.labels):
+            return i
+        return None
+
+    def counts(self, values):
+        """Return per-bin counts for an iterable of values."""
+        if np is not None:
+            values = np.fromiter(values, dtype=float)
+            indexes = np.searchsorted(self.edges, values, side="right") - 1
+            indexes = indexes[(indexes >= 0) & (indexes < len(self.labels))]
+            return np.bincount(indexes, minlength=len(self.labels)).tolist()
+        counts = [0] * len(self.labels)
+        for value in values:
+            i = self.bucket(value)
+            if i is not None:
+                counts[i] += 1
+        return counts
+
+    def render(self, counts, label_header="Range"):
+        """Render a count/percentage table as printed by the analysis scripts."""
+        total = sum(counts)
+        lines = [
+            "-" * 50,
+            f"{label_header:<10} {'Count':<10} {'Percentage':<10}",
+            "-" * 50,
+        ]
+        for label, count in zip(self.labels, counts):
+            percentage = (count / total) * 100 if total > 0 else 0
+            lines.append(f"{label:<10} {count:<10} {percentage:.2f}%")
+        return "\n".join(lines)
+
+
+# Provider percent_complete, with 100% in a bin of its own.
+PERCENT_COMPLETE_HISTOGRAM = Histogram(
+    [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100, 101],
+    [f"{i}-{i + 9}%" for i in range(0, 100, 10)] + ["100%"],
+)
+
+# Absolute percent_complete difference between v1 and v2 checklist reports.
+PERCENT_DIFF_HISTOGRAM = Histogram([0, 3, 5, 10, 20, 30, 40, 50, 60, 70, 80, 90, 101])
@@ -0,0 +1,227 @@
+"""On-disk cache of parsed provider maps, stored next to each export.
+
+``<export>.mapcache`` holds a small pickled header, a pickled layout and then
+the stored maps. The header records the export's path, size, mtime and a
+content fingerprint, plus a key describing how it was parsed; nothing else is
+read until the header matches the export on disk, so a stale cache costs one
+small read. Any change to the export invalidates it automatically.
+
+Provider maps (the dicts in a tuple or list result, such as the
+``(provider_map, stats)`` pairs of the loaders) are not pickled as a whole:
+each record is marshalled on its own, behind an id -> position index and an
+offset table. Loading the cache only reads the index and memory-maps the
+file; a record is decoded the first time it is looked up (see
+LazyProviderMap). Other results are pickled as they are.
+
+The fingerprint hashes the size and evenly spaced 64KB samples of the file
+(including the first and last block) rather than every byte, which keeps
+validation of multi-gigabyte exports in the milliseconds.
+"""
+
+import marshal
+import mmap
+import os
+import pickle
+import sys
+from array import array
+from collections.abc import Mapping
+from hashlib import blake2b
+
+from .log_parser import paused_gc
+
+CACHE_SUFFIX = ".mapcache"
+FORMAT_VERSION = 2
+SAMPLE_SIZE = 64 * 1024
+SAMPLE_COUNT = 16
+
+_MISSING = object()
+
+
+def fingerprint(path, size):
+    digest = blake2b(str(size).encode(), digest_size=16)
+    with open(path, "rb") as f:
+        if size <= SAMPLE_SIZE * SAMPLE_COUNT:
+            digest.update(f.read())
+        else:
+            step = (size - SAMPLE_SIZE) // (SAMPLE_COUNT - 1)
+            for i in range(SAMPLE_COUNT):
+                f.seek(i * step)
+                digest.update(f.read(SAMPLE_SIZE))
+    return digest.hexdigest()
+
+
+def _header(path, key):
+    stat = os.stat(path)
+    return {
+        "format": FORMAT_VERSION,
+        # marshal's format is only stable within one Python version
+        "python": sys.version_info[:2],
+        "path": os.path.abspath(path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "fingerprint": fingerprint(path, stat.st_size),
+        "key": key,
+    }
+
+
+class LazyProviderMap(Mapping):
+    """Read-only provider map backed by a memory-mapped cache file.
+
+    Iteration order is the order of the map that was stored. Each record is
+    decoded on first access and kept, so later lookups cost a dict lookup.
+    ``values()`` and ``items()`` decode every remaining record in one pass
+    with the cyclic GC paused, which is several times faster than decoding
+    them one lookup at a time.
+    """
+
+    def __init__(self, positions, offsets, buffer):
+        self._positions = positions
+        self._offsets = offsets
+        self._buffer = buffer
+        self._decoded = {}
+
+    def _decode(self, i):
+        return marshal.loads(self._buffer[self._offsets[i] : self._offsets[i + 1]])
+
+    def _decode_all(self):
+        if len(self._decoded) == len(self._positions):
+            return
+        decoded = {}
+        with paused_gc():
+            for provider_id, i in self._positions.items():
+                record = self._decoded.get(provider_id, _MISSING)
+                decoded[provider_id] = self._decode(i) if record is _MISSING else record
+        # Rebuilt in stored order, so the views below iterate like the map did
+        self._decoded = decoded
+
+    def __getitem__(self, provider_id):
+        record = self._decoded.get(provider_id, _MISSING)
+        if record is _MISSING:
+            record = self._decode(self._positions[provider_id])
+            self._decoded[provider_id] = record
+        return record
+
+    def __contains__(self, provider_id):
+        return provider_id in self._positions
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def keys(self):
+        return self._positions.keys()
+
+    def values(self):
+        self._decode_all()
+        return self._decoded.values()
+
+    def items(self):
+        self._decode_all()
+        return self._decoded.items()
+
+
+def _dump_map(provider_map):
+    """Return the index, offset table and record bytes for ``provider_map``."""
+    positions = {}
+    offsets = array("Q", [0])
+    records = []
+    end = 0
+    for i, (provider_id, record) in enumerate(provider_map.items()):
+        data = marshal.dumps(record)
+        positions[provider_id] = i
+        records.append(data)
+        end += len(data)
+        offsets.append(end)
+    return [marshal.dumps(positions), offsets.tobytes(), b"".join(records)]
+
+
+def _layout(result):
+    """Split ``result`` into a picklable layout and the maps stored lazily.
+
+    The layout lists the sizes of each map's sections after the pickles.
+    """
+    if not isinstance(result, (tuple, list)):
+        return {"result": result}, []
+    parts, sections = [], []
+    for value in result:
+        if isinstance(value, dict):
+            parts.append(("map", len(sections)))
+            sections.append(_dump_map(value))
+        else:
+            parts.append(("value", value))
+    layout = {
+        "type": type(result),
+        "parts": parts,
+        "sections": [[len(data) for data in section] for section in sections],
+    }
+    return layout, sections
+
+
+def _restore(layout, buffer, start):
+    if "result" in layout:
+        return layout["result"]
+    maps = []
+    for positions_size, offsets_size, records_size in layout["sections"]:
+        positions = marshal.loads(buffer[start : start + positions_size])
+        start += positions_size
+        offsets = array("Q")
+        offsets.frombytes(buffer[start : start + offsets_size])
+        start += offsets_size
+        if len(offsets) != len(positions) + 1 or offsets[-1] != records_size:
+            raise ValueError("corrupt map section")
+        records = memoryview(buffer)[start : start + records_size]
+        start += records_size
+        maps.append(LazyProviderMap(positions, offsets, records))
+    if start != len(buffer):
+        raise ValueError("corrupt map cache")
+    return layout["type"](
+        maps[value] if kind == "map" else value for kind, value in layout["parts"]
+    )
+
+
+def load_cached(path, key):
+    """Return the cached result for ``path`` parsed as ``key``, or None."""
+    try:
+        with open(path + CACHE_SUFFIX, "rb") as f:
+            if pickle.load(f) != _header(path, key):
+                return None
+            layout = pickle.load(f)
+            start = f.tell()
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return _restore(layout, buffer, start)
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        return None
+
+
+def store_cached(path, key, result):
+    tmp_path = f"{path}{CACHE_SUFFIX}.{os.getpid()}.tmp"
+    try:
+        layout, sections = _layout(result)
+        with open(tmp_path, "wb") as f:
+            pickle.dump(_header(path, key), f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(layout, f, protocol=pickle.HIGHEST_PROTOCOL)
+            for section in sections:
+                for data in section:
+                    f.write(data)
+        os.replace(tmp_path, path + CACHE_SUFFIX)
+    except OSError as e:
+        print(f"Could not write parse cache for {path}: {e}", file=sys.stderr)
+
+
+def cached_load_all(paths, key, loader):
+    """Return ``loader(paths)`` results, reusing and refreshing per-path caches.
+
+    ``loader`` takes a list of paths and returns one result per path; it is
+    only called for the paths whose cache is missing or stale. Provider maps
+    come back as LazyProviderMap on a cache hit.
+    """
+    results = [load_cached(path, key) for path in paths]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        loaded = loader([paths[i] for i in missing])
+        for i, result in zip(missing, loaded):
+            store_cached(paths[i], key, result)
+            results[i] = result
+    return results
@@ -0,0 +1,84 @@
+"""Diff ``missing_sections`` between two onboarding aggregate runs.
+
+Each provider's ``missing_sections`` is flattened once into a frozenset of
+``(section, field)`` pairs, so removed and added fields are plain set
+differences instead of list membership checks.
+"""
+
+from collections import Counter, defaultdict
+
+
+def flatten_fields(fields):
+    """Flatten nested lists in fields."""
+    result = []
+
+    if not fields:
+        return result
+
+    if not isinstance(fields, list):
+        return [str(fields)]
+
+    for field in fields:
+        if isinstance(field, list):
+            result.extend(flatten_fields(field))
+        else:
+            result.append(str(field))
+
+    return result
+
+
+def flatten_missing_sections(missing_sections):
+    """Return the ``(section, field)`` pairs of a ``missing_sections`` dict."""
+    return frozenset(
+        (section, field)
+        for section, fields in (missing_sections or {}).items()
+        for field in flatten_fields(fields)
+    )
+
+
+class MissingSectionsDiff:
+    """Removed/added missing fields between a before and an after run.
+
+    ``removed`` and ``added`` map ``(section, field)`` to the IDs of the
+    providers where that field stopped or started being missing.
+    ``by_provider`` keeps the sorted removed/added pairs of every provider
+    that changed.
+    """
+
+    def __init__(self):
+        self.removed = defaultdict(list)
+        self.added = defaultdict(list)
+        self.by_provider = {}
+
+    def add(self, provider_id, before_missing, after_missing):
+        before = flatten_missing_sections(before_missing)
+        after = flatten_missing_sections(after_missing)
+        removed = sorted(before - after)
+        added = sorted(after - before)
+        for key in removed:
+            self.removed[key].append(provider_id)
+        for key in added:
+            self.added[key].append(provider_id)
+        if removed or added:
+            self.by_provider[provider_id] = (removed, added)
+        return removed, added
+
+    def removed_counts(self):
+        return Counter({key: len(ids) for key, ids in self.removed.items()})
+
+    def added_counts(self):
+        return Counter({key: len(ids) for key, ids in self.added.items()})
+
+
+def diff_provider_maps(before_map, after_map, provider_ids=None):
+    """Diff ``missing_sections`` for providers present in both maps."""
+    if provider_ids is None:
+        provider_ids = before_map.keys() & after_map.keys()
+    diff = MissingSectionsDiff()
+    for provider_id in provider_ids:
+        diff.add(
+            provider_id,
+            before_map[provider_id].get("missing_sections", {}),
+            after_map[provider_id].get("missing_sections", {}),
+        )
+    return diff
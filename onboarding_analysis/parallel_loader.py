@@ -0,0 +1,155 @@
+"""Parse large log exports on several cores.
+
+Each export is split into byte ranges that start and end on CSV record
+boundaries. The ranges of all exports are parsed in one process pool and the
+partial maps are merged back in file order, so the result is identical to
+``log_parser.load_provider_map``, including last-row-wins per provider.
+
+Workers send their partial maps back as ``marshal`` bytes, which the parent
+loads with the cyclic GC paused. Pickling the dicts instead made loading
+them in the parent cost about two thirds of parsing the export, which capped
+the speedup at about 1.5x however many cores were used.
+
+A newline ends a record only when an even number of ``"`` characters precede
+it (escaped quotes come in pairs), so boundaries are found by tracking quote
+parity with ``bytes.count`` rather than by parsing the CSV.
+"""
+
+import csv
+import io
+import marshal
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .log_parser import (
+    MESSAGE_COL_INDEX,
+    ParseStats,
+    iter_rows_records,
+    load_provider_map,
+    paused_gc,
+)
+
+CHUNK_SIZE = 64 * 1024 * 1024
+_BLOCK_SIZE = 1024 * 1024
+
+
+def _next_record_start(f, pos, odd_quotes):
+    """Return the offset after the first record-ending newline at or after ``pos``.
+
+    ``f`` must be positioned at ``pos`` and ``odd_quotes`` is the quote parity
+    of everything before it. Returns None if the file ends first.
+    """
+    while True:
+        block = f.read(_BLOCK_SIZE)
+        if not block:
+            return None
+        start = 0
+        while True:
+            newline = block.find(b"\n", start)
+            if newline == -1:
+                odd_quotes ^= block.count(b'"', start) & 1
+                break
+            odd_quotes ^= block.count(b'"', start, newline) & 1
+            if not odd_quotes:
+                return pos + newline + 1
+            start = newline + 1
+        pos += len(block)
+
+
+def split_records(path, chunk_size=CHUNK_SIZE, header=True):
+    """Return ``(start, end)`` byte ranges of roughly ``chunk_size`` bytes.
+
+    Every range starts at a record boundary; the header record is excluded.
+    """
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, "rb") as f:
+        start = 0
+        if header:
+            start = _next_record_start(f, 0, False) or size
+        pos, odd_quotes = start, False
+        f.seek(start)
+        while start < size:
+            target = start + chunk_size
+            if target >= size:
+                ranges.append((start, size))
+                break
+            while pos < target:
+                block = f.read(min(_BLOCK_SIZE, target - pos))
+                odd_quotes ^= block.count(b'"') & 1
+                pos += len(block)
+            end = _next_record_start(f, pos, odd_quotes) or size
+            ranges.append((start, end))
+            start = pos = end
+            odd_quotes = False
+            f.seek(start)
+    return ranges
+
+
+def parse_range(path, start, end, column=MESSAGE_COL_INDEX):
+    """Parse one byte range into a provider map and its ParseStats."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    stats = ParseStats()
+    reader = csv.reader(io.StringIO(data.decode("utf-8"), newline=""))
+    with paused_gc():
+        return dict(iter_rows_records(reader, column, stats)), stats
+
+
+def _parse_range_marshalled(path, start, end, column):
+    provider_map, stats = parse_range(path, start, end, column)
+    return marshal.dumps(provider_map), stats
+
+
+def worker_count(processes=None):
+    """Processes to use, or 1 when the work should run in this process.
+
+    Without an explicit count every core is used. The platform must be able
+    to fork: the analysis scripts have no ``__main__`` guard, so spawned
+    workers would re-run them.
+    """
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return 1
+    return processes or os.cpu_count() or 1
+
+
+def load_provider_maps(
+    paths, column=MESSAGE_COL_INDEX, header=True, processes=None, chunk_size=CHUNK_SIZE
+):
+    """Load several exports concurrently.
+
+    Returns one ``(provider_map, stats)`` pair per path, in order. Falls back
+    to the serial loader when worker_count is 1, since parsing in a single
+    worker only adds the cost of sending its map back.
+    """
+    processes = worker_count(processes)
+    if processes == 1:
+        results = []
+        for path in paths:
+            stats = ParseStats()
+            results.append((load_provider_map(path, column, stats, header), stats))
+        return results
+
+    jobs = [
+        (index, path, start, end)
+        for index, path in enumerate(paths)
+        for start, end in split_records(path, chunk_size, header)
+    ]
+    results = [({}, ParseStats()) for _ in paths]
+    with ProcessPoolExecutor(
+        max_workers=min(processes, len(jobs)) or 1,
+        mp_context=multiprocessing.get_context("fork"),
+    ) as executor:
+        futures = [
+            executor.submit(_parse_range_marshalled, path, start, end, column)
+            for _, path, start, end in jobs
+        ]
+        # Merge in submission order, which is file order within each path.
+        with paused_gc():
+            for (index, _, _, _), future in zip(jobs, futures):
+                data, stats = future.result()
+                results[index][0].update(marshal.loads(data))
+                results[index][1].merge(stats)
+    return results
@@ -0,0 +1,97 @@
+"""Fused dedup-and-parse pipeline for raw onboarding aggregate log exports.
+
+Reads a raw export once, drops repeated messages on the fly and parses only
+the first occurrence of each message into the provider map. The result is the
+same as running ``deduplicate_csv.py`` and then parsing the deduplicated file,
+without writing and re-reading the intermediate CSV (it can still be written
+with ``deduped_path``).
+"""
+
+import csv
+import marshal
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from .dedup import (
+    DEFAULT_MEMORY_MB,
+    DEFAULT_PARTITIONS,
+    DedupStats,
+    iter_unique_rows,
+    max_digests_for,
+    resolve_column,
+)
+from .log_parser import MESSAGE_COL_INDEX, ParseStats, iter_rows_records, paused_gc
+from .parallel_loader import worker_count
+
+
+def _tee_rows(rows, writer):
+    for row in rows:
+        writer.writerow(row)
+        yield row
+
+
+def load_export(
+    path,
+    column=MESSAGE_COL_INDEX,
+    deduped_path=None,
+    memory_mb=DEFAULT_MEMORY_MB,
+    partitions=DEFAULT_PARTITIONS,
+):
+    """Dedup and parse one raw export.
+
+    Returns ``(provider_map, parse_stats, dedup_stats)``.
+    """
+    parse_stats, dedup_stats = ParseStats(), DedupStats()
+    with open(path, "r", newline="") as src:
+        reader = csv.reader(src)
+        header = next(reader)
+        column = resolve_column(header, column)
+        rows = iter_unique_rows(
+            reader, column, max_digests_for(memory_mb), partitions, dedup_stats
+        )
+        with paused_gc():
+            if deduped_path is None:
+                provider_map = dict(iter_rows_records(rows, column, parse_stats))
+            else:
+                with open(deduped_path, "w", newline="") as dst:
+                    writer = csv.writer(dst)
+                    writer.writerow(header)
+                    provider_map = dict(
+                        iter_rows_records(_tee_rows(rows, writer), column, parse_stats)
+                    )
+    return provider_map, parse_stats, dedup_stats
+
+
+def _load_export_marshalled(path, **kwargs):
+    provider_map, parse_stats, dedup_stats = load_export(path, **kwargs)
+    return marshal.dumps(provider_map), parse_stats, dedup_stats
+
+
+def load_exports(paths, deduped_paths=None, processes=None, **kwargs):
+    """Run load_export for several raw exports, one process per export.
+
+    Deduplication is global and order dependent, so a single export is not
+    split across processes the way parallel_loader splits deduped ones.
+    """
+    deduped_paths = deduped_paths or [None] * len(paths)
+    processes = min(worker_count(processes), len(paths))
+    if processes <= 1:
+        return [
+            load_export(path, deduped_path=deduped_path, **kwargs)
+            for path, deduped_path in zip(paths, deduped_paths)
+        ]
+    with ProcessPoolExecutor(
+        max_workers=processes, mp_context=multiprocessing.get_context("fork")
+    ) as executor:
+        futures = [
+            executor.submit(
+                _load_export_marshalled, path, deduped_path=deduped_path, **kwargs
+            )
+            for path, deduped_path in zip(paths, deduped_paths)
+        ]
+        results = []
+        with paused_gc():
+            for future in futures:
+                data, parse_stats, dedup_stats = future.result()
+                results.append((marshal.loads(data), parse_stats, dedup_stats))
+        return results
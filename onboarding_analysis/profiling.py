@@ -0,0 +1,136 @@
+"""Opt-in cProfile and query profiling for Celery tasks.
+
+Decorate a task function with ``profiled`` (under ``shared_task``) and pass
+``profile=True`` to profile a run, or a fraction such as ``profile=0.01`` to
+profile that share of runs. Tasks fanned out without the kwarg pick the rate
+up from $CELERY_TASK_PROFILE, so sampling the batch tasks samples a fraction
+of the items they process. The variable is read once per worker process; it
+takes a rate or true/false, and any other value turns profiling off with a
+warning.
+
+A profiled run writes a pstats file to $CELERY_TASK_PROFILE_DIR (the temp
+dir by default) and logs the top functions by cumulative time, the query
+count, the total DB time and the slowest statements. When profiling is off
+the wrapper only reads the kwarg and the parsed rate.
+"""
+
+import cProfile
+import functools
+import io
+import logging
+import os
+import pstats
+import random
+import tempfile
+import time
+from collections import defaultdict
+
+PROFILE_ENV = "CELERY_TASK_PROFILE"
+PROFILE_DIR_ENV = "CELERY_TASK_PROFILE_DIR"
+TOP_N = 25
+_TRUE = ("true", "yes", "on")
+_FALSE = ("false", "no", "off", "")
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """``connection.execute_wrapper`` callable timing every query."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        # sql -> [count, seconds]; parameters are not part of the sql
+        self.by_sql = defaultdict(lambda: [0, 0.0])
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.seconds += elapsed
+            totals = self.by_sql[sql]
+            totals[0] += 1
+            totals[1] += elapsed
+
+    def top(self, n=TOP_N):
+        return sorted(self.by_sql.items(), key=lambda item: item[1][1], reverse=True)[
+            :n
+        ]
+
+
+@functools.lru_cache(maxsize=None)
+def env_profile_rate():
+    """The rate from $CELERY_TASK_PROFILE, parsed on first use."""
+    value = os.environ.get(PROFILE_ENV, "").strip().lower()
+    if value in _TRUE:
+        return 1.0
+    if value in _FALSE:
+        return 0.0
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning(f"Ignoring {PROFILE_ENV}={value!r}, expected a rate or true")
+        return 0.0
+
+
+def should_profile(profile):
+    if profile is None:
+        profile = env_profile_rate()
+    if not profile:
+        return False
+    return random.random() < float(profile)
+
+
+def write_profile(profiler, name, directory=None):
+    directory = directory or os.environ.get(PROFILE_DIR_ENV) or tempfile.gettempdir()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(
+        directory, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.prof"
+    )
+    profiler.dump_stats(path)
+    return path
+
+
+def format_profile(name, elapsed, profiler, queries, path, top_n=TOP_N):
+    out = io.StringIO()
+    out.write(
+        f"[PROFILE] {name}: {elapsed:.2f}s, {queries.count} queries, "
+        f"{queries.seconds:.2f}s in DB, profile written to {path}\n"
+    )
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats("cumulative").print_stats(top_n)
+    out.write(f"Top {top_n} queries by total time:\n")
+    for sql, (count, seconds) in queries.top(top_n):
+        out.write(f"{seconds:10.3f}s {count:8d}x  {sql[:300]}\n")
+    return out.getvalue()
+
+
+def run_profiled(func, logger, args, kwargs):
+    from django.db import connection
+
+    queries = QueryStats()
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    try:
+        with connection.execute_wrapper(queries):
+            return profiler.runcall(func, *args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - start
+        path = write_profile(profiler, func.__name__)
+        logger.info(format_profile(func.__name__, elapsed, profiler, queries, path))
+
+
+def profiled(func):
+    """Add the ``profile`` kwarg to a task function."""
+    logger = logging.getLogger(func.__module__)
+
+    @functools.wraps(func)
+    def wrapper(*args, profile=None, **kwargs):
+        if not should_profile(profile):
+            return func(*args, **kwargs)
+        return run_profiled(func, logger, args, kwargs)
+
+    return wrapper
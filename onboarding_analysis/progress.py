@@ -0,0 +1,113 @@
+"""Throttled progress reporting and per-phase timings for long scans.
+
+ProgressReporter replaces one log line per row with one line every
+``every`` rows or ``interval`` seconds, whichever comes first, including
+throughput and an ETA. PhaseTimer accumulates wall time per named phase,
+excluding time spent in phases nested inside it, and emits a single summary
+line, plus DogStatsD metrics when the datadog client is installed.
+"""
+
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+try:
+    from datadog import statsd
+except ImportError:  # pragma: no cover - datadog is optional
+    statsd = None
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+class ProgressReporter:
+    def __init__(self, logger, prefix, total=None, every=10000, interval=60.0):
+        self.logger = logger
+        # Loggers that add their own prefix pass an empty one
+        self.prefix = f"{prefix} " if prefix else ""
+        self.total = total
+        self.every = every
+        self.interval = interval
+        self.count = 0
+        self.started = time.monotonic()
+        self._next_count = every
+        self._next_time = self.started + interval
+
+    def advance(self, n=1):
+        self.count += n
+        if self.count >= self._next_count:
+            self.report()
+        else:
+            now = time.monotonic()
+            if now >= self._next_time:
+                self.report(now)
+
+    def report(self, now=None):
+        now = time.monotonic() if now is None else now
+        self._next_count = self.count + self.every
+        self._next_time = now + self.interval
+        self.logger.info(f"{self.prefix}{self.status(now)}")
+
+    def status(self, now=None):
+        now = time.monotonic() if now is None else now
+        elapsed = now - self.started
+        rate = self.count / elapsed if elapsed > 0 else 0.0
+        if not self.total:
+            return f"Progress: {self.count} ({rate:.1f}/s)"
+        percent = self.count / self.total * 100
+        remaining = max(self.total - self.count, 0)
+        eta = format_duration(remaining / rate) if rate else "?"
+        return (
+            f"Progress: {self.count}/{self.total} ({percent:.1f}%) "
+            f"{rate:.1f}/s ETA {eta}"
+        )
+
+    def finish(self):
+        elapsed = time.monotonic() - self.started
+        self.logger.info(
+            f"{self.prefix}Done: {self.count} in {format_duration(elapsed)} "
+            f"({self.status()})"
+        )
+
+
+class PhaseTimer:
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.calls = Counter()
+        # Time spent in nested phases, one slot per open phase
+        self._nested = []
+
+    @contextmanager
+    def phase(self, name):
+        self._nested.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.seconds[name] += elapsed - self._nested.pop()
+            self.calls[name] += 1
+            if self._nested:
+                self._nested[-1] += elapsed
+
+    def summary(self):
+        return ", ".join(
+            f"{name}={seconds:.2f}s/{self.calls[name]}"
+            for name, seconds in sorted(
+                self.seconds.items(), key=lambda item: item[1], reverse=True
+            )
+        )
+
+    def emit(self, logger, prefix, metric, tags=()):
+        """Log the summary and send one ``<metric>.seconds`` gauge per phase."""
+        prefix = f"{prefix} " if prefix else ""
+        logger.info(f"{prefix}Phase timings: {self.summary()}")
+        if statsd is None:
+            return
+        for name, seconds in self.seconds.items():
+            phase_tags = [*tags, f"phase:{name}"]
+            statsd.gauge(f"{metric}.seconds", seconds, tags=phase_tags)
+            statsd.gauge(f"{metric}.calls", self.calls[name], tags=phase_tags)
@@ -0,0 +1,85 @@
+"""Org and profession breakdown for a set of provider IDs.
+
+Runs inside the Django app. Instead of loading every provider and following
+``provider.user.org`` row by row, each batch of IDs is grouped in the database
+with ``values(...).annotate(Count(...))`` queries. ``org`` is not a model
+field, so the org is reached through the user's active membership, the way
+aggregate.py filters. Demo accounts and providers without an active
+membership are left out.
+"""
+
+from collections import Counter, defaultdict
+from itertools import islice
+from typing import Dict, List, NamedTuple
+
+# Keeps the IN list well below what Postgres plans comfortably
+IN_BATCH_SIZE = 5000
+ORG_NAME = "user__org_memberships__organization__name"
+
+
+class ProviderBreakdown(NamedTuple):
+    org_counts: Counter
+    profession_counts: Counter
+    # Only filled in when the breakdown is asked for IDs
+    org_ids: Dict[str, List[str]]
+    profession_ids: Dict[str, List[str]]
+
+
+def read_provider_ids(source):
+    """Return unique provider IDs, in order, from an iterable or a file with one per line."""
+    if isinstance(source, str):
+        with open(source) as f:
+            source = [line.strip() for line in f]
+    return list(
+        dict.fromkeys(str(provider_id) for provider_id in source if provider_id)
+    )
+
+
+def iter_batches(items, batch_size):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def get_provider_breakdown(source, with_ids=False, batch_size=IN_BATCH_SIZE):
+    from apps.providers.models import Provider
+    from django.db.models import Count
+
+    org_counts = Counter()
+    profession_counts = Counter()
+    org_ids = defaultdict(list)
+    profession_ids = defaultdict(list)
+
+    for batch in iter_batches(read_provider_ids(source), batch_size):
+        providers = Provider.objects.filter(
+            id__in=batch,
+            user__org_memberships__is_active=True,
+            user__org_memberships__organization__is_demo_account=False,
+        )
+        # A provider with several active memberships is counted once per org,
+        # but only once for its profession
+        orgs = providers.values(ORG_NAME).annotate(count=Count("id", distinct=True))
+        for group in orgs:
+            org_counts[group[ORG_NAME]] += group["count"]
+        professions = providers.values("profession").annotate(
+            count=Count("id", distinct=True)
+        )
+        for group in professions:
+            profession_counts[group["profession"]] += group["count"]
+
+        if with_ids:
+            seen = set()
+            rows = providers.values_list("id", ORG_NAME, "profession").order_by("id")
+            for provider_id, org_name, profession in rows:
+                provider_id = str(provider_id)
+                org_ids[org_name].append(provider_id)
+                if provider_id not in seen:
+                    seen.add(provider_id)
+                    profession_ids[profession].append(provider_id)
+
+    return ProviderBreakdown(
+        org_counts, profession_counts, dict(org_ids), dict(profession_ids)
+    )
@@ -0,0 +1,87 @@
+"""JSON-lines sink for onboarding aggregate results.
+
+Each run writes one row per provider under ``<directory>/<run_label>/``. Every
+worker process appends to its own file, so concurrent Celery workers on a
+shared volume never interleave writes. The rows have the same shape as the
+JSON payload of the old ``[ONBOARDING-AGGREGATE] Provider data`` log lines,
+so the comparison scripts can read a run directly instead of scraping logs.
+Each row also records when it was written, so a provider written more than
+once (a retried task, say) resolves to its latest row whichever file it is in.
+"""
+
+import glob
+import json
+import os
+import socket
+import time
+
+RESULTS_DIR_ENV = "ONBOARDING_AGGREGATE_RESULTS_DIR"
+
+
+class JsonLinesResultSink:
+    def __init__(self, directory, run_label):
+        self.path = os.path.join(
+            directory, run_label, f"{socket.gethostname()}-{os.getpid()}.jsonl"
+        )
+        self.run_label = run_label
+        self._file = None
+
+    def write(self, provider_id, percent_complete, missing_sections):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        row = {
+            "run_label": self.run_label,
+            "provider_id": str(provider_id),
+            "percent_complete": percent_complete,
+            "missing_sections": missing_sections,
+            "written_at": time.time_ns(),
+        }
+        self._file.write(json.dumps(row) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def get_result_sink(run_label, directory=None):
+    """Return a sink for ``run_label``, or None when no results directory is set."""
+    directory = directory or os.environ.get(RESULTS_DIR_ENV)
+    if not directory or not run_label:
+        return None
+    return JsonLinesResultSink(directory, run_label)
+
+
+def load_results(directory, run_label):
+    """Build a provider ID -> result map for one run.
+
+    If a provider was written more than once, the row with the latest
+    ``written_at`` wins; rows without one (written before it was recorded)
+    count as oldest, and ties go to the last row read.
+    """
+    results = {}
+    written = {}
+    for path in sorted(glob.glob(os.path.join(directory, run_label, "*.jsonl"))):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                provider_id = row["provider_id"]
+                written_at = row.get("written_at", 0)
+                if written_at < written.get(provider_id, 0):
+                    continue
+                written[provider_id] = written_at
+                results[provider_id] = {
+                    "percent_complete": row["percent_complete"],
+                    "missing_sections": row["missing_sections"],
+                }
+    return results
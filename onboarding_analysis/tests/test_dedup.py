@@ -0,0 +1,71 @@
+import csv
+
+import pytest
+
+from onboarding_analysis.dedup import dedup_csv, iter_unique_rows, resolve_column
+
+HEADER = ["date", "host", "service", "message"]
+
+
+def make_rows(count=2000, distinct=300):
+    return [
+        ["2025-01-01", f"host-{n}", "onboarding", f"message {n % distinct}"]
+        for n in range(count)
+    ]
+
+
+def expected_unique(rows, key_column):
+    seen, unique = set(), []
+    for row in rows:
+        if row[key_column] not in seen:
+            seen.add(row[key_column])
+            unique.append(row)
+    return unique
+
+
+@pytest.mark.parametrize("max_digests", [10**6, 50])
+def test_iter_unique_rows_keeps_first_occurrence_in_order(max_digests):
+    rows = make_rows()
+    unique = list(iter_unique_rows(rows, 3, max_digests=max_digests, partitions=8))
+    assert unique == expected_unique(rows, 3)
+    assert len(unique) == 300
+
+
+def test_iter_unique_rows_rejects_negative_column():
+    with pytest.raises(ValueError):
+        list(iter_unique_rows(make_rows(), -1))
+
+
+@pytest.mark.parametrize(
+    "column, index",
+    [(3, 3), ("3", 3), (5, 5), (-1, 3), ("-1", 3), ("-4", 0), ("host", 1)],
+)
+def test_resolve_column(column, index):
+    assert resolve_column(HEADER, column) == index
+
+
+@pytest.mark.parametrize("column", [-5, "-7"])
+def test_resolve_column_out_of_range(column):
+    with pytest.raises(ValueError):
+        resolve_column(HEADER, column)
+
+
+@pytest.mark.parametrize("memory_mb", [512, 0])
+def test_dedup_csv_negative_column_spilled(tmp_path, memory_mb):
+    """A negative key column dedups on the same column with and without spilling."""
+    rows = make_rows()
+    input_path, output_path = tmp_path / "export.csv", tmp_path / "deduped.csv"
+    with open(input_path, "w", newline="") as f:
+        csv.writer(f).writerows([HEADER, *rows])
+
+    _, key_index, stats = dedup_csv(
+        input_path, output_path, -1, memory_mb=memory_mb, partitions=8
+    )
+
+    with open(output_path, newline="") as f:
+        header, *unique = list(csv.reader(f))
+    assert key_index == 3
+    assert header == HEADER
+    assert unique == expected_unique(rows, 3)
+    assert stats.spilled == (memory_mb == 0)
+    assert stats.unique == 300
@@ -0,0 +1,122 @@
+import pickle
+
+from onboarding_analysis.field_index import MissingFieldIndex
+from onboarding_analysis.map_cache import CACHE_SUFFIX, cached_load_all
+
+RECORDS = [
+    ("p1", {"missing_sections": {"edu": ["school"], "education": ["school"]}}),
+    ("p2", {"missing_sections": {"education": ["school name", "degree"]}}),
+    ("p3", {"missing_sections": {"education": ["schooling"], "work": ["employer"]}}),
+    ("p4", {"missing_sections": {"edu": [["scope"]]}}),
+    ("p5", {"percent_complete": 100}),
+    ("p6", {"missing_sections": None}),
+]
+
+
+def make_index(records=RECORDS):
+    return MissingFieldIndex.build(records)
+
+
+def test_query():
+    index = make_index()
+    assert index.query("education", "school") == ["p1"]
+    assert index.query("education", "missing") == []
+    assert index.query("nowhere", "school") == []
+
+
+def test_query_prefix_stays_in_its_section():
+    index = make_index()
+    # "edu" sorts right before "education"; its matches must not leak over
+    assert index.query_prefix("edu", "sc") == {"school": ["p1"], "scope": ["p4"]}
+    assert index.query_prefix("edu", "") == {"school": ["p1"], "scope": ["p4"]}
+    assert index.query_prefix("education", "school") == {
+        "school": ["p1"],
+        "school name": ["p2"],
+        "schooling": ["p3"],
+    }
+
+
+def test_query_prefix_without_matches():
+    index = make_index()
+    assert index.query_prefix("education", "zzz") == {}
+    assert index.query_prefix("educ", "") == {}
+    assert index.query_prefix("work", "a") == {}
+    assert index.query_prefix("zzz", "") == {}
+
+
+def test_query_all_and_any():
+    index = make_index()
+    school = ("education", "school")
+    employer = ("work", "employer")
+    schooling = ("education", "schooling")
+    assert index.query_all([schooling, employer]) == ["p3"]
+    assert index.query_all([school, employer]) == []
+    assert index.query_all(key for key in [school]) == ["p1"]
+    assert index.query_any([school, employer]) == ["p1", "p3"]
+    assert index.query_any([("edu", "school"), school]) == ["p1"]
+
+
+def test_empty_key_list():
+    index = make_index()
+    assert index.query_all([]) == []
+    assert index.query_any([]) == []
+
+
+def test_empty_index():
+    index = make_index([])
+    assert index.counts() == {}
+    assert index.sections() == []
+    assert index.query_prefix("education", "") == {}
+
+
+def test_provider_logged_several_times_is_listed_once():
+    index = make_index(
+        [
+            ("p1", {"missing_sections": {"education": ["school"]}}),
+            ("p1", {"missing_sections": {"education": ["school", "degree"]}}),
+            ("p2", {"missing_sections": {"education": ["school"]}}),
+        ]
+    )
+    # A field missing in any of a provider's rows is indexed, once
+    assert index.query("education", "school") == ["p1", "p2"]
+    assert index.query("education", "degree") == ["p1"]
+    assert index.counts() == {("education", "school"): 2, ("education", "degree"): 1}
+
+
+def test_counts_and_sections():
+    index = make_index()
+    assert index.sections() == ["edu", "education", "work"]
+    assert index.counts()[("education", "school")] == 1
+
+
+def assert_same_index(index, other):
+    assert other.postings == index.postings
+    assert other.query_prefix("edu", "") == index.query_prefix("edu", "")
+    assert other.query_prefix("education", "school") == index.query_prefix(
+        "education", "school"
+    )
+    assert other.sections() == index.sections()
+
+
+def test_pickle_round_trip():
+    index = make_index()
+    assert_same_index(index, pickle.loads(pickle.dumps(index)))
+
+
+def test_reloaded_from_map_cache(tmp_path):
+    sheet = tmp_path / "sheet.csv"
+    sheet.write_text("placeholder\n")
+    built = []
+
+    def loader(paths):
+        built.extend(paths)
+        return [make_index() for _ in paths]
+
+    key = ("missing-field-index", 0)
+    (index,) = cached_load_all([str(sheet)], key, loader)
+    assert (tmp_path / f"sheet.csv{CACHE_SUFFIX}").exists()
+    (reloaded,) = cached_load_all([str(sheet)], key, loader)
+    assert built == [str(sheet)]
+    assert isinstance(reloaded, MissingFieldIndex)
+    assert reloaded is not index
+    assert_same_index(index, reloaded)
@@ -0,0 +1,151 @@
+import math
+import random
+
+import pytest
+
+from onboarding_analysis import histogram
+from onboarding_analysis.histogram import (
+    PERCENT_COMPLETE_HISTOGRAM,
+    PERCENT_DIFF_HISTOGRAM,
+    Histogram,
+)
+
+# The range dict PercentDiffAnalyzer scanned before the histogram replaced it
+OLD_DIFF_RANGES = [
+    range(3),
+    range(3, 5),
+    range(5, 10),
+    range(10, 20),
+    range(20, 30),
+    range(30, 40),
+    range(40, 50),
+    range(50, 60),
+    range(60, 70),
+    range(70, 80),
+    range(80, 90),
+    range(90, 101),
+]
+
+
+def old_diff_label(diff):
+    for r in OLD_DIFF_RANGES:
+        if diff in r:
+            return f"{r.start}-{r.stop}"
+    return None
+
+
+def label(hist, value):
+    i = hist.bucket(value)
+    return None if i is None else hist.labels[i]
+
+
+def test_diff_labels_match_the_old_range_keys():
+    assert PERCENT_DIFF_HISTOGRAM.labels == [
+        f"{r.start}-{r.stop}" for r in OLD_DIFF_RANGES
+    ]
+
+
+@pytest.mark.parametrize("diff", range(-1, 103))
+def test_integer_diffs_land_where_the_range_dict_put_them(diff):
+    assert label(PERCENT_DIFF_HISTOGRAM, diff) == old_diff_label(diff)
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (0, "0-9%"),
+        (9, "0-9%"),
+        (10, "10-19%"),
+        (99, "90-99%"),
+        (99.9, "90-99%"),
+        (100, "100%"),
+        (100.5, "100%"),
+        (101, None),
+        (-1, None),
+    ],
+)
+def test_percent_complete_bins(value, expected):
+    assert label(PERCENT_COMPLETE_HISTOGRAM, value) == expected
+
+
+def test_bin_edges():
+    hist = Histogram([0, 10, 20])
+    # Bins are [0, 10) and [10, 20)
+    assert hist.bucket(0) == 0
+    assert hist.bucket(9.999) == 0
+    assert hist.bucket(10) == 1
+    assert hist.bucket(19.999) == 1
+    assert hist.bucket(20) is None
+
+
+@pytest.mark.parametrize(
+    "value", [-0.001, -100, 20, 1e9, math.inf, -math.inf, math.nan]
+)
+def test_out_of_range_values(value):
+    hist = Histogram([0, 10, 20])
+    assert hist.bucket(value) is None
+
+
+def test_floats():
+    assert label(PERCENT_DIFF_HISTOGRAM, 2.5) == "0-3"
+    assert label(PERCENT_DIFF_HISTOGRAM, 4.99) == "3-5"
+    assert label(PERCENT_DIFF_HISTOGRAM, 100.9) == "90-101"
+
+
+def test_invalid_edges_and_labels():
+    with pytest.raises(ValueError):
+        Histogram([0])
+    with pytest.raises(ValueError):
+        Histogram([0, 10, 10])
+    with pytest.raises(ValueError):
+        Histogram([0, 10, 20], ["only one"])
+
+
+def sample_values():
+    rng = random.Random(7)
+    values = [rng.uniform(-10, 110) for _ in range(5000)]
+    values += [rng.randint(-5, 105) for _ in range(5000)]
+    values += PERCENT_DIFF_HISTOGRAM.edges + PERCENT_COMPLETE_HISTOGRAM.edges
+    values += [math.inf, -math.inf, math.nan]
+    return values
+
+
+def bisect_counts(hist, values, monkeypatch):
+    with monkeypatch.context() as patch:
+        patch.setattr(histogram, "np", None)
+        return hist.counts(iter(values))
+
+
+@pytest.mark.parametrize("hist", [PERCENT_COMPLETE_HISTOGRAM, PERCENT_DIFF_HISTOGRAM])
+def test_counts_match_bucket(hist, monkeypatch):
+    values = sample_values()
+    expected = [0] * len(hist.labels)
+    for value in values:
+        i = hist.bucket(value)
+        if i is not None:
+            expected[i] += 1
+    assert bisect_counts(hist, values, monkeypatch) == expected
+
+
+@pytest.mark.parametrize("hist", [PERCENT_COMPLETE_HISTOGRAM, PERCENT_DIFF_HISTOGRAM])
+def test_numpy_and_bisect_counts_agree(hist, monkeypatch):
+    pytest.importorskip("numpy")
+    values = sample_values()
+    numpy_counts = hist.counts(iter(values))
+    assert numpy_counts == bisect_counts(hist, values, monkeypatch)
+    assert all(type(count) is int for count in numpy_counts)
+
+
+def test_counts_of_nothing(monkeypatch):
+    hist = Histogram([0, 10, 20])
+    assert hist.counts([]) == [0, 0]
+    assert bisect_counts(hist, [], monkeypatch) == [0, 0]
+
+
+def test_render():
+    hist = Histogram([0, 10, 20])
+    lines = hist.render([1, 3]).splitlines()
+    assert lines[1].split() == ["Range", "Count", "Percentage"]
+    assert lines[3].split() == ["0-10", "1", "25.00%"]
+    assert lines[4].split() == ["10-20", "3", "75.00%"]
+    assert hist.render([0, 0]).splitlines()[3].split() == ["0-10", "0", "0.00%"]
@@ -0,0 +1,72 @@
+import os
+
+from onboarding_analysis.log_parser import ParseStats
+from onboarding_analysis.map_cache import (
+    CACHE_SUFFIX,
+    LazyProviderMap,
+    cached_load_all,
+    load_cached,
+)
+
+KEY = ("deduped", 3)
+
+
+def make_map(count=500):
+    return {
+        f"provider-{n}": {
+            "percent_complete": n % 101,
+            "missing_sections": {"work": [f"field {n}", ["nested"]], "license": []},
+        }
+        for n in range(count)
+    }
+
+
+def write_export(tmp_path, name="export.csv"):
+    path = tmp_path / name
+    path.write_text("a,b,c,message\n")
+    return str(path)
+
+
+def test_cache_round_trip_is_lazy(tmp_path):
+    path = write_export(tmp_path)
+    provider_map, stats = make_map(), ParseStats()
+    stats.rows = 500
+    calls = []
+
+    def loader(paths):
+        calls.append(paths)
+        return [(provider_map, stats)]
+
+    assert cached_load_all([path], KEY, loader) == [(provider_map, stats)]
+    ((cached_map, cached_stats),) = cached_load_all([path], KEY, loader)
+
+    assert len(calls) == 1
+    assert isinstance(cached_map, LazyProviderMap)
+    assert cached_stats.rows == 500
+    assert len(cached_map) == 500 and "provider-7" in cached_map
+    assert "provider-500" not in cached_map
+    assert cached_map["provider-7"] == provider_map["provider-7"]
+    assert list(cached_map) == list(provider_map)
+    assert list(cached_map.items()) == list(provider_map.items())
+    assert cached_map.keys() & {"provider-1", "x"} == {"provider-1"}
+    assert dict(cached_map) == provider_map
+
+
+def test_cache_of_other_results(tmp_path):
+    path = write_export(tmp_path)
+    cached_load_all([path], KEY, lambda paths: [{"not", "a", "tuple"}])
+    assert load_cached(path, KEY) == {"not", "a", "tuple"}
+
+
+def test_stale_or_corrupt_cache_is_ignored(tmp_path):
+    path = write_export(tmp_path)
+    cached_load_all([path], KEY, lambda paths: [(make_map(), ParseStats())])
+    assert load_cached(path, ("raw", 3)) is None
+
+    with open(path + CACHE_SUFFIX, "r+b") as f:
+        f.truncate(os.path.getsize(path + CACHE_SUFFIX) - 10)
+    assert load_cached(path, KEY) is None
+
+    with open(path, "a") as f:
+        f.write("x,y,z,changed\n")
+    assert load_cached(path, KEY) is None
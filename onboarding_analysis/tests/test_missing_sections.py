@@ -0,0 +1,94 @@
+import pytest
+
+from onboarding_analysis.missing_sections import (
+    MissingSectionsDiff,
+    diff_provider_maps,
+    flatten_fields,
+    flatten_missing_sections,
+)
+
+
+@pytest.mark.parametrize(
+    "fields, expected",
+    [
+        (["a", "b"], ["a", "b"]),
+        (["a", ["b", ["c", []]], "d"], ["a", "b", "c", "d"]),
+        ([1, [2.5]], ["1", "2.5"]),
+        ("single", ["single"]),
+        ([], []),
+        (None, []),
+        ("", []),
+    ],
+)
+def test_flatten_fields(fields, expected):
+    assert flatten_fields(fields) == expected
+
+
+def test_flatten_missing_sections_nested_and_duplicate_fields():
+    assert flatten_missing_sections(
+        {"work": ["employer", ["employer", "start"]], "license": []}
+    ) == {("work", "employer"), ("work", "start")}
+
+
+@pytest.mark.parametrize("missing_sections", [None, {}, {"work": []}, {"work": None}])
+def test_flatten_missing_sections_empty(missing_sections):
+    assert flatten_missing_sections(missing_sections) == frozenset()
+
+
+def test_section_names_with_colons_are_kept_whole():
+    pairs = flatten_missing_sections({"education:degree": ["school:name"]})
+    assert pairs == {("education:degree", "school:name")}
+
+
+def test_add_section_missing_on_one_side():
+    diff = MissingSectionsDiff()
+    removed, added = diff.add(
+        "p1",
+        {"work": ["employer"], "license": ["number"]},
+        {"work": ["employer"], "education": ["school"]},
+    )
+    assert removed == [("license", "number")]
+    assert added == [("education", "school")]
+    assert diff.by_provider == {"p1": (removed, added)}
+
+
+def test_unchanged_provider_is_not_listed():
+    diff = MissingSectionsDiff()
+    assert diff.add("p1", {"work": ["a", ["b"]]}, {"work": [["b"], "a"]}) == ([], [])
+    assert diff.by_provider == {}
+    assert diff.removed_counts() == {}
+    assert diff.added_counts() == {}
+
+
+def test_duplicate_field_counts_once_per_provider():
+    diff = MissingSectionsDiff()
+    diff.add("p1", {"work": ["employer", "employer", ["employer"]]}, {})
+    diff.add("p2", {"work": ["employer"]}, {"work": []})
+    assert diff.removed[("work", "employer")] == ["p1", "p2"]
+    assert diff.removed_counts() == {("work", "employer"): 2}
+
+
+def test_diff_provider_maps():
+    before = {
+        "p1": {"percent_complete": 50, "missing_sections": {"work": ["employer"]}},
+        "p2": {"percent_complete": 90},
+        "p3": {"missing_sections": None},
+        "only-before": {"missing_sections": {"work": ["employer"]}},
+    }
+    after = {
+        "p1": {"missing_sections": {}},
+        "p2": {"missing_sections": {"edu:cation": ["school: name"]}},
+        "p3": {"missing_sections": {}},
+        "only-after": {"missing_sections": {"work": ["start"]}},
+    }
+    diff = diff_provider_maps(before, after)
+    assert diff.removed_counts() == {("work", "employer"): 1}
+    assert diff.added_counts() == {("edu:cation", "school: name"): 1}
+    assert set(diff.by_provider) == {"p1", "p2"}
+
+
+def test_diff_provider_maps_given_ids():
+    before = {"p1": {"missing_sections": {"work": ["a"]}}, "p2": {}}
+    after = {"p1": {"missing_sections": {}}, "p2": {"missing_sections": {"x": "b"}}}
+    diff = diff_provider_maps(before, after, ["p2"])
+    assert diff.by_provider == {"p2": ([], [("x", "b")])}
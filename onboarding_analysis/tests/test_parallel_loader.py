@@ -0,0 +1,48 @@
+import csv
+import json
+
+from onboarding_analysis.log_parser import PROVIDER_DATA_PREFIX, load_provider_map
+from onboarding_analysis.parallel_loader import load_provider_maps, worker_count
+from onboarding_analysis.pipeline import load_export, load_exports
+
+
+def write_export(path, count=3000):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["date", "host", "service", "message"])
+        for n in range(count):
+            # Providers repeat, so last-row-wins has to hold across ranges
+            payload = json.dumps(
+                {"percent_complete": n % 101, "missing_sections": {"work": [f"f{n}"]}}
+            )
+            message = f"[ONBOARDING-AGGREGATE] {PROVIDER_DATA_PREFIX}{n % 700:x}: "
+            if n % 97 == 0:
+                message += "{not json"
+            else:
+                message += f"{payload}\n"
+            writer.writerow(["2025-01-01", "host", "onboarding", message])
+    return path
+
+
+def test_worker_count():
+    assert worker_count(1) == 1
+    assert worker_count(3) == 3
+    assert worker_count() >= 1
+
+
+def test_load_provider_maps_matches_serial(tmp_path):
+    paths = [write_export(tmp_path / f"{name}.csv") for name in ("before", "after")]
+    results = load_provider_maps(paths, processes=2, chunk_size=16 * 1024)
+    for path, (provider_map, stats) in zip(paths, results):
+        assert list(provider_map.items()) == list(load_provider_map(path).items())
+        assert (stats.rows, stats.records, stats.malformed) == (3000, 2969, 31)
+
+
+def test_load_exports_matches_load_export(tmp_path):
+    paths = [write_export(tmp_path / f"{name}.csv") for name in ("before", "after")]
+    for path, (provider_map, parse_stats, _) in zip(
+        paths, load_exports(paths, processes=2)
+    ):
+        expected_map, expected_stats, _ = load_export(path)
+        assert list(provider_map.items()) == list(expected_map.items())
+        assert str(parse_stats) == str(expected_stats)
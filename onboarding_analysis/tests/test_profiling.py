@@ -0,0 +1,45 @@
+import logging
+
+import pytest
+
+from onboarding_analysis import profiling
+
+
+@pytest.fixture(autouse=True)
+def fresh_rate():
+    profiling.env_profile_rate.cache_clear()
+    yield
+    profiling.env_profile_rate.cache_clear()
+
+
+@pytest.mark.parametrize(
+    "value, rate",
+    [
+        ("0.25", 0.25),
+        ("1", 1.0),
+        ("true", 1.0),
+        ("Yes", 1.0),
+        ("false", 0.0),
+        ("", 0.0),
+    ],
+)
+def test_env_profile_rate(monkeypatch, value, rate):
+    monkeypatch.setenv(profiling.PROFILE_ENV, value)
+    assert profiling.env_profile_rate() == rate
+
+
+def test_invalid_rate_disables_profiling(monkeypatch, caplog):
+    monkeypatch.setenv(profiling.PROFILE_ENV, "sometimes")
+    with caplog.at_level(logging.WARNING):
+        assert not profiling.should_profile(None)
+        assert not profiling.should_profile(None)
+    # Parsed once, so the warning is logged once
+    assert len(caplog.records) == 1
+
+
+def test_rate_is_read_once(monkeypatch):
+    monkeypatch.setenv(profiling.PROFILE_ENV, "1")
+    assert profiling.should_profile(None)
+    monkeypatch.setenv(profiling.PROFILE_ENV, "0")
+    assert profiling.should_profile(None)
+    assert not profiling.should_profile(0)
@@ -0,0 +1,50 @@
+import json
+
+from onboarding_analysis.results import JsonLinesResultSink, load_results
+
+
+def write_rows(path, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+
+
+def row(provider_id, percent_complete, written_at=None):
+    row = {
+        "run_label": "run",
+        "provider_id": provider_id,
+        "percent_complete": percent_complete,
+        "missing_sections": {},
+    }
+    if written_at is not None:
+        row["written_at"] = written_at
+    return row
+
+
+def test_latest_row_wins_across_files(tmp_path):
+    # The file read last holds the older row for "a"
+    write_rows(
+        tmp_path / "run" / "host-a-1.jsonl", [row("a", 90, 200), row("b", 10, 50)]
+    )
+    write_rows(
+        tmp_path / "run" / "host-b-2.jsonl", [row("a", 40, 100), row("b", 20, 60)]
+    )
+    results = load_results(str(tmp_path), "run")
+    assert results["a"]["percent_complete"] == 90
+    assert results["b"]["percent_complete"] == 20
+
+
+def test_rows_without_written_at_count_as_oldest(tmp_path):
+    write_rows(tmp_path / "run" / "a.jsonl", [row("a", 90, 1)])
+    write_rows(tmp_path / "run" / "b.jsonl", [row("a", 40), row("b", 10), row("b", 20)])
+    results = load_results(str(tmp_path), "run")
+    assert results["a"]["percent_complete"] == 90
+    assert results["b"]["percent_complete"] == 20
+
+
+def test_sink_round_trip(tmp_path):
+    with JsonLinesResultSink(str(tmp_path), "run") as sink:
+        sink.write("a", 10, {"work": ["f"]})
+        sink.write("a", 30, {})
+    assert load_results(str(tmp_path), "run") == {
+        "a": {"percent_complete": 30, "missing_sections": {}}
+    }
@@ -1,37 +1,78 @@
 from celery import shared_task
 
 
-@shared_task()
-def task_get_single_provider_onboarding_aggregate_data(provider_id):
+def record_provider_onboarding_aggregate_data(provider, task_logger, sink=None):
     import json
 
+    percent_complete = provider.get_percent_complete()
+    missing_sections = provider.get_missing_sections()
+    if sink is not None:
+        sink.write(provider.id, percent_complete, missing_sections)
+        return
+    info = {
+        "percent_complete": percent_complete,
+        "missing_sections": missing_sections,
+    }
+    task_logger.info(f"Provider data {provider.id}: {json.dumps(info)}\n")
+
+
+@shared_task()
+def task_get_single_provider_onboarding_aggregate_data(provider_id, run_label=None):
     from apps.providers.models import Provider
     from libs.logging import LoggingAdapterBuilder
+    from onboarding_analysis.results import get_result_sink
 
     task_logger = LoggingAdapterBuilder().set_prefix("[ONBOARDING-AGGREGATE]").build()
 
+    sink = get_result_sink(run_label)
     try:
         provider = Provider.objects.get(id=provider_id)
-        percent_complete = provider.get_percent_complete()
-        missing_sections = provider.get_missing_sections()
-        info = {
-            "percent_complete": percent_complete,
-            "missing_sections": missing_sections,
-        }
-        task_logger.info(f"Provider data {provider.id}: {json.dumps(info)}\n")
+        record_provider_onboarding_aggregate_data(provider, task_logger, sink)
     except Exception:
         task_logger.error(f"Provider {provider_id} failed")
+    finally:
+        if sink is not None:
+            sink.close()
 
 
 @shared_task()
-def task_get_provider_onboarding_aggregate_data():
-    from apps.core.helpers import chunked_queryset
-    from apps.providers.models import Provider, ProviderChecklist
+def task_get_batch_provider_onboarding_aggregate_data(provider_ids, run_label=None):
+    from apps.providers.models import Provider
     from libs.logging import LoggingAdapterBuilder
+    from onboarding_analysis.results import get_result_sink
 
     task_logger = LoggingAdapterBuilder().set_prefix("[ONBOARDING-AGGREGATE]").build()
 
-    CHUNK_SIZE = 300
+    sink = get_result_sink(run_label)
+    providers = Provider.objects.filter(id__in=provider_ids)
+    found = set()
+    try:
+        for provider in providers:
+            found.add(str(provider.id))
+            try:
+                record_provider_onboarding_aggregate_data(provider, task_logger, sink)
+            except Exception:
+                task_logger.error(f"Provider {provider.id} failed")
+    finally:
+        if sink is not None:
+            sink.close()
+    for provider_id in set(map(str, provider_ids)) - found:
+        task_logger.error(f"Provider {provider_id} failed")
+
+
+@shared_task()
+def task_get_provider_onboarding_aggregate_data(batch_size=300, run_label=None):
+    """Fan out onboarding aggregate computation in batches of provider ids.
+
+    With a ``run_label`` and ONBOARDING_AGGREGATE_RESULTS_DIR set on the
+    workers, results are written to onboarding_analysis.results instead of
+    the log.
+    """
+    from apps.providers.models import Provider, ProviderChecklist
+    from libs.logging import LoggingAdapterBuilder
+    from onboarding_analysis.progress import PhaseTimer, ProgressReporter
+
+    task_logger = LoggingAdapterBuilder().set_prefix("[ONBOARDING-AGGREGATE]").build()
 
     provider_ids = (
         ProviderChecklist.objects.prefetch_related("provider__user__org_memberships")
@@ -44,12 +85,24 @@ def task_get_provider_onboarding_aggregate_data():
         .values_list("provider_id", flat=True)
         .distinct()
     )
-    providers = Provider.objects.filter(id__in=provider_ids)
-    total = providers.count()
-    current = 0
-
-    for chunk in chunked_queryset(providers, CHUNK_SIZE):
-        for provider in chunk:
-            current += 1
-            task_get_single_provider_onboarding_aggregate_data.delay(provider.id)
-            task_logger.info(f"Progress: {current} / {total}")
+    ids = Provider.objects.filter(id__in=provider_ids).values_list("id", flat=True)
+    timer = PhaseTimer()
+    with timer.phase("db_count"):
+        progress = ProgressReporter(task_logger, None, total=ids.count())
+
+    batch = []
+    for provider_id in ids.iterator(chunk_size=batch_size):
+        batch.append(str(provider_id))
+        if len(batch) == batch_size:
+            with timer.phase("enqueue"):
+                task_get_batch_provider_onboarding_aggregate_data.delay(
+                    batch, run_label
+                )
+            progress.advance(len(batch))
+            batch = []
+    if batch:
+        with timer.phase("enqueue"):
+            task_get_batch_provider_onboarding_aggregate_data.delay(batch, run_label)
+        progress.advance(len(batch))
+    progress.finish()
+    timer.emit(task_logger, None, "onboarding_aggregate.fan_out")
@@ -1,42 +1,75 @@
-import json
-import csv
-import re
+import argparse
+import os
+import sys
 
-# Regular expression to extract provider ID and missing sections data
-pattern = r'\[ONBOARDING-AGGREGATE\] Provider data ([a-f0-9-]+): (.*)'
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from onboarding_analysis.field_index import MissingFieldIndex
+from onboarding_analysis.log_parser import ParseStats, iter_provider_records
+from onboarding_analysis.map_cache import cached_load_all
 
 # The specific string we're looking for
-target_string = "Missing Required Education History: Institution for Professional Degree"
-
-# List to store matching provider IDs
-matching_ids = []
-
-# Read the file and process each line
-with open('sheet.csv', 'r') as file:
-    reader = csv.reader(file)
-    for row in reader:
-        if not row:
-            continue
-
-        # Extract the log entry
-        log_entry = row[0]
-        match = re.search(pattern, log_entry)
-
-        if match:
-            provider_id = match.group(1)
-            data_str = match.group(2)
-
-            try:
-                # Parse the JSON data
-                data = json.loads(data_str)
-                missing_sections = data.get("missing_sections", {})
-
-                # Check if education section contains our target string
-                education_issues = missing_sections.get("education", [])
-                if target_string in education_issues:
-                    matching_ids.append(provider_id)
-            except json.JSONDecodeError:
-                print(f"Failed to parse JSON for provider {provider_id}")
+target_string = (
+    "Missing Required Education History: Institution for Professional Degree"
+)
+
+parser = argparse.ArgumentParser(
+    description="Find providers with given missing fields."
+)
+parser.add_argument("--sheet", default="sheet.csv")
+parser.add_argument("--section", default="education")
+parser.add_argument(
+    "--field",
+    action="append",
+    help="Missing field to match; repeat to require every field (default: the target string)",
+)
+parser.add_argument(
+    "--prefix", help="Match every field of --section starting with this prefix"
+)
+parser.add_argument(
+    "--counts",
+    action="store_true",
+    help="Print the provider count of every missing field",
+)
+parser.add_argument(
+    "--output", help="Also write the matching provider IDs to this file, one per line"
+)
+args = parser.parse_args()
+
+
+def build_index(paths):
+    indexes = []
+    for path in paths:
+        # The log entry is in the first column and the sheet has no header row
+        stats = ParseStats()
+        records = iter_provider_records(path, 0, stats, header=False)
+        indexes.append(MissingFieldIndex.build(records))
+        if stats.malformed:
+            print(f"Failed to parse {stats.malformed} rows")
+    return indexes
+
+
+# The index is built on the first run and reused until the sheet changes
+(index,) = cached_load_all([args.sheet], ("missing-field-index", 0), build_index)
+
+if args.counts:
+    for (section, field), count in index.counts().most_common():
+        print(f"{count}\t{section}\t{field}")
+    sys.exit()
+
+if args.prefix is not None:
+    matches = index.query_prefix(args.section, args.prefix)
+    for field, provider_ids in matches.items():
+        print(f"{field}: {len(provider_ids)}")
+    matching_ids = sorted(
+        {pid for provider_ids in matches.values() for pid in provider_ids}
+    )
+else:
+    fields = args.field or [target_string]
+    matching_ids = index.query_all((args.section, field) for field in fields)
+
+if args.output:
+    with open(args.output, "w") as f:
+        f.writelines(f"{provider_id}\n" for provider_id in matching_ids)
 
 # Print results as a Python list
 print(matching_ids)
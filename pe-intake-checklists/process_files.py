@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
+import argparse
 import csv
-import re
-import json
-from collections import defaultdict, Counter
+import os
+import sys
 
 # File paths
 before_file = "before_turning_on_ff_deduped.csv"
@@ -11,112 +11,90 @@ after_file = "after_deduped.csv"
 # Message is in the 4th column (index 3)
 MESSAGE_COL_INDEX = 3
 
-
-def extract_provider_id_and_json(message):
-    """Extract the provider ID and JSON data from the message."""
-    # Extract provider ID
-    id_match = re.search(r'Provider data ([0-9a-f-]+):', message)
-    if not id_match:
-        return None, None
-
-    provider_id = id_match.group(1)
-
-    # Extract JSON data
-    json_match = re.search(r'({.*})', message)
-    if not json_match:
-        return provider_id, None
-
-    json_str = json_match.group(1)
-    try:
-        json_data = json.loads(json_str)
-        return provider_id, json_data
-    except json.JSONDecodeError:
-        return provider_id, None
-
-
-def build_message_map(file_path):
-    """Build a map of provider IDs to JSON data from a CSV file."""
-    message_map = {}
-
-    with open(file_path, 'r', newline='') as csvfile:
-        reader = csv.reader(csvfile)
-        header = next(reader)  # Skip header
-
-        for row in reader:
-            message = row[MESSAGE_COL_INDEX]
-            provider_id, json_data = extract_provider_id_and_json(message)
-
-            if provider_id and json_data:
-                message_map[provider_id] = json_data
-
-    return message_map
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from onboarding_analysis.histogram import PERCENT_COMPLETE_HISTOGRAM
+from onboarding_analysis.map_cache import cached_load_all
+from onboarding_analysis.missing_sections import diff_provider_maps
+from onboarding_analysis.parallel_loader import load_provider_maps
+from onboarding_analysis.pipeline import load_exports
+from onboarding_analysis.results import load_results
+
+parser = argparse.ArgumentParser(description="Compare before/after onboarding aggregate data.")
+parser.add_argument(
+    "--results-dir",
+    help="Read runs written by the onboarding aggregate tasks instead of the CSV log exports",
+)
+parser.add_argument("--before-label", help="Run label of the 'before' run in --results-dir")
+parser.add_argument("--after-label", help="Run label of the 'after' run in --results-dir")
+parser.add_argument("--jobs", type=int, help="Processes used to parse the CSV exports (default: all cores)")
+parser.add_argument("--raw-before", help="Raw (not deduplicated) 'before' export, deduplicated while parsing")
+parser.add_argument("--raw-after", help="Raw (not deduplicated) 'after' export, deduplicated while parsing")
+parser.add_argument(
+    "--write-deduped",
+    action="store_true",
+    help=f"With --raw-before/--raw-after, also write {before_file} and {after_file}",
+)
+parser.add_argument(
+    "--no-cache",
+    action="store_true",
+    help="Always re-parse the CSV exports instead of using their .mapcache files",
+)
+args = parser.parse_args()
+if args.results_dir and not (args.before_label and args.after_label):
+    parser.error("--results-dir requires --before-label and --after-label")
+if bool(args.raw_before) != bool(args.raw_after):
+    parser.error("--raw-before and --raw-after must be used together")
 
 
 def analyze_percentage_distribution(message_map, label):
     """Analyze the distribution of percent_complete values in the message map."""
-    # Initialize counters for each range
-    ranges = {
-        "0-9%": 0,
-        "10-19%": 0,
-        "20-29%": 0,
-        "30-39%": 0,
-        "40-49%": 0,
-        "50-59%": 0,
-        "60-69%": 0,
-        "70-79%": 0,
-        "80-89%": 0,
-        "90-99%": 0,
-        "100%": 0
-    }
-
-    # Count providers in each range
-    for provider_id, data in message_map.items():
-        percent = data.get("percent_complete", 0)
-
-        if percent == 100:
-            ranges["100%"] += 1
-        elif 0 <= percent < 10:
-            ranges["0-9%"] += 1
-        elif 10 <= percent < 20:
-            ranges["10-19%"] += 1
-        elif 20 <= percent < 30:
-            ranges["20-29%"] += 1
-        elif 30 <= percent < 40:
-            ranges["30-39%"] += 1
-        elif 40 <= percent < 50:
-            ranges["40-49%"] += 1
-        elif 50 <= percent < 60:
-            ranges["50-59%"] += 1
-        elif 60 <= percent < 70:
-            ranges["60-69%"] += 1
-        elif 70 <= percent < 80:
-            ranges["70-79%"] += 1
-        elif 80 <= percent < 90:
-            ranges["80-89%"] += 1
-        elif 90 <= percent < 100:
-            ranges["90-99%"] += 1
-
-    # Calculate total
-    total = sum(ranges.values())
+    counts = PERCENT_COMPLETE_HISTOGRAM.counts(
+        data.get("percent_complete", 0) for data in message_map.values()
+    )
 
     # Print the distribution
-    print(f"\nPercentage Distribution for {label} (Total: {total} providers):")
-    print("-" * 50)
-    print(f"{'Range':<10} {'Count':<10} {'Percentage':<10}")
-    print("-" * 50)
-
-    for range_label, count in ranges.items():
-        percentage = (count / total) * 100 if total > 0 else 0
-        print(f"{range_label:<10} {count:<10} {percentage:.2f}%")
+    print(f"\nPercentage Distribution for {label} (Total: {sum(counts)} providers):")
+    print(PERCENT_COMPLETE_HISTOGRAM.render(counts))
 
 
 # Build maps for both files
-print(f"Building map for 'before' file: {before_file}")
-before_map = build_message_map(before_file)
+if args.results_dir:
+    before_file = os.path.join(args.results_dir, args.before_label)
+    after_file = os.path.join(args.results_dir, args.after_label)
+    print(f"Loading runs: {before_file}, {after_file}")
+    before_map = load_results(args.results_dir, args.before_label)
+    after_map = load_results(args.results_dir, args.after_label)
+elif args.raw_before:
+    # Dedup and parse each raw export in one pass, both exports concurrently
+    print(f"Deduplicating and parsing 'before' file: {args.raw_before} and 'after' file: {args.raw_after}")
+    raw_files = [args.raw_before, args.raw_after]
+    if args.no_cache or args.write_deduped:
+        deduped_files = [before_file, after_file] if args.write_deduped else None
+        results = load_exports(raw_files, deduped_files, processes=args.jobs, column=MESSAGE_COL_INDEX)
+    else:
+        results = cached_load_all(
+            raw_files,
+            ("raw", MESSAGE_COL_INDEX),
+            lambda paths: load_exports(paths, processes=args.jobs, column=MESSAGE_COL_INDEX),
+        )
+    (before_map, before_stats, before_dedup), (after_map, after_stats, after_dedup) = results
+    print(f"Removed {before_dedup.duplicates} duplicate rows from 'before' file, parsed {before_stats}")
+    print(f"Removed {after_dedup.duplicates} duplicate rows from 'after' file, parsed {after_stats}")
+else:
+    # Both exports are parsed concurrently, each split across processes
+    print(f"Building maps for 'before' file: {before_file} and 'after' file: {after_file}")
+    if args.no_cache:
+        results = load_provider_maps([before_file, after_file], MESSAGE_COL_INDEX, processes=args.jobs)
+    else:
+        results = cached_load_all(
+            [before_file, after_file],
+            ("deduped", MESSAGE_COL_INDEX),
+            lambda paths: load_provider_maps(paths, MESSAGE_COL_INDEX, processes=args.jobs),
+        )
+    (before_map, before_stats), (after_map, after_stats) = results
+    print(f"Parsed 'before' file: {before_stats}")
+    print(f"Parsed 'after' file: {after_stats}")
 print(f"Found {len(before_map)} provider entries in 'before' file")
-
-print(f"\nBuilding map for 'after' file: {after_file}")
-after_map = build_message_map(after_file)
 print(f"Found {len(after_map)} provider entries in 'after' file")
 
 # Analyze percentage distributions
@@ -127,82 +105,14 @@ analyze_percentage_distribution(after_map, "After")
 common_ids = set(before_map.keys()) & set(after_map.keys())
 print(f"\nFound {len(common_ids)} provider IDs common to both files")
 
-# Initialize counters for missing sections analysis
-fields_in_before_not_after = defaultdict(list)  # Provider ID -> [(section, field), ...]
-new_missing_fields = Counter()  # (section, field) -> count
-
-
-def flatten_fields(fields):
-    """Flatten nested lists in fields."""
-    result = []
-
-    if not fields:
-        return result
-
-    if not isinstance(fields, list):
-        return [str(fields)]
-
-    for field in fields:
-        if isinstance(field, list):
-            result.extend(flatten_fields(field))
-        else:
-            result.append(str(field))
-
-    return result
-
-
 # Analyze missing sections for each provider
-for provider_id in common_ids:
-    before_data = before_map[provider_id]
-    after_data = after_map[provider_id]
-
-    # Get missing sections from both maps
-    before_missing = before_data.get("missing_sections", {})
-    after_missing = after_data.get("missing_sections", {})
-
-    # Check for fields in before but not in after (shouldn't happen)
-    for section, fields in before_missing.items():
-        # Flatten any nested lists in fields
-        flat_before_fields = flatten_fields(fields)
-
-        if not flat_before_fields:
-            continue
-
-        # If section doesn't exist in after, all fields are missing
-        if section not in after_missing:
-            for field in flat_before_fields:
-                fields_in_before_not_after[provider_id].append((section, field))
-        else:
-            # Flatten any nested lists in after fields
-            flat_after_fields = flatten_fields(after_missing.get(section, []))
-
-            # Check each field
-            for field in flat_before_fields:
-                if field not in flat_after_fields:
-                    fields_in_before_not_after[provider_id].append((section, field))
-
-    # Check for fields in after but not in before (new missing fields)
-    for section, fields in after_missing.items():
-        # Flatten any nested lists in fields
-        flat_after_fields = flatten_fields(fields)
-
-        if not flat_after_fields:
-            continue
-
-        # If section doesn't exist in before, all fields are new
-        if section not in before_missing:
-            for field in flat_after_fields:
-                # Use string representation for Counter key
-                new_missing_fields[f"{section}:{field}"] += 1
-        else:
-            # Flatten any nested lists in before fields
-            flat_before_fields = flatten_fields(before_missing.get(section, []))
-
-            # Check each field
-            for field in flat_after_fields:
-                if field not in flat_before_fields:
-                    # Use string representation for Counter key
-                    new_missing_fields[f"{section}:{field}"] += 1
+diff = diff_provider_maps(before_map, after_map, common_ids)
+fields_in_before_not_after = {
+    provider_id: removed
+    for provider_id, (removed, added) in diff.by_provider.items()
+    if removed
+}
+new_missing_fields = diff.added_counts()  # (section, field) -> count
 
 # Print fields that are in before but not in after (shouldn't happen)
 if fields_in_before_not_after:
@@ -224,8 +134,7 @@ if new_missing_fields:
         writer.writerow(['Section', 'Field', 'Count'])
 
         # Sort by count (descending)
-        for key, count in sorted(new_missing_fields.items(), key=lambda x: x[1], reverse=True):
-            section, field = key.split(":", 1)  # Split at first colon
+        for (section, field), count in new_missing_fields.most_common():
             writer.writerow([section, field, count])
 
     print(f"Found {len(new_missing_fields)} new missing fields in 'after'")